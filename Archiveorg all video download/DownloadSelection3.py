@@ -2,6 +2,7 @@ import os
 import json
 import requests
 from tqdm import tqdm
+import archive_metadata
 
 # JSON file with video metadata
 json_file = 'output/collection_video_details.json'
@@ -14,19 +15,14 @@ os.makedirs(download_dir, exist_ok=True)
 start_label = 12541
 end_label = 12565  # Set your end label here
 
+# Shared metadata cache, so re-running a label range costs no network round trips
+resolver = archive_metadata.MetadataResolver()
+
 def get_smallest_video_url(item_identifier):
-    item_metadata_url = f"https://archive.org/metadata/{item_identifier}"
-    response = requests.get(item_metadata_url)
-    if response.status_code != 200:
-        return None
-    data = response.json()
-    files = data.get('files', [])
-    video_files = [file for file in files if file['name'].endswith('.mp4')]
-    if not video_files:
+    data = resolver.get(item_identifier)
+    if not data:
         return None
-    # Sort video files by size and get the smallest one
-    video_files.sort(key=lambda x: int(x.get('size', float('inf'))))
-    return f"https://archive.org/download/{item_identifier}/{video_files[0]['name']}"
+    return archive_metadata.smallest_mp4_url(item_identifier, data)
 
 def download_video(url, filename):
     response = requests.get(url, stream=True)
@@ -47,6 +43,10 @@ def main(start_label, end_label):
     with open(json_file, 'r', encoding='utf-8') as f:
         video_details_list = json.load(f)
 
+    # Resolve the whole range concurrently up front; the loop below then hits the cache
+    resolver.get_many([video_details['Identifier'] for video_details in video_details_list
+                       if start_label <= video_details['Label'] <= end_label])
+
     for video_details in video_details_list:
         label = video_details['Label']
         if start_label <= label <= end_label:
@@ -1,7 +1,7 @@
 import os
 import json
-import requests
-from tqdm import tqdm
+import archive_metadata
+import segmented_download
 
 # JSON file with video metadata
 json_file = 'output/collection_video_details.json'
@@ -14,39 +14,25 @@ os.makedirs(download_dir, exist_ok=True)
 start_label = 6201
 end_label = 6300  # Set your end label here
 
+# Shared metadata cache, so re-running a label range costs no network round trips
+resolver = archive_metadata.MetadataResolver()
+
 def get_smallest_video_url(item_identifier):
-    item_metadata_url = f"https://archive.org/metadata/{item_identifier}"
-    response = requests.get(item_metadata_url)
-    if response.status_code != 200:
-        return None
-    data = response.json()
-    files = data.get('files', [])
-    video_files = [file for file in files if file['name'].endswith('.mp4')]
-    if not video_files:
+    data = resolver.get(item_identifier)
+    if not data:
         return None
-    # Sort video files by size and get the smallest one
-    video_files.sort(key=lambda x: int(x.get('size', float('inf'))))
-    return f"https://archive.org/download/{item_identifier}/{video_files[0]['name']}"
-
-def download_video(url, filename):
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
-    chunk_size = 1024  # 1 KB
-    with open(filename, 'wb') as file, tqdm(
-        desc=filename,
-        total=total_size,
-        unit='iB',
-        unit_scale=True,
-        unit_divisor=1024,
-    ) as bar:
-        for chunk in response.iter_content(chunk_size=chunk_size):
-            file.write(chunk)
-            bar.update(len(chunk))
+    return archive_metadata.smallest_mp4_url(item_identifier, data)
 
 def main(start_label, end_label):
     with open(json_file, 'r', encoding='utf-8') as f:
         video_details_list = json.load(f)
 
+    # Resolve the whole range concurrently up front; the loop below then hits the cache
+    resolver.get_many([video_details['Identifier'] for video_details in video_details_list
+                       if start_label <= video_details['Label'] <= end_label])
+
+    jobs = []
+    labels = {}
     for video_details in video_details_list:
         label = video_details['Label']
         if start_label <= label <= end_label:
@@ -54,13 +40,18 @@ def main(start_label, end_label):
             video_url = get_smallest_video_url(item_identifier)
             if video_url:
                 filename = os.path.join(download_dir, f'{label}.mp4')
-                try:
-                    download_video(video_url, filename)
-                    print(f"Downloaded video {label} from {video_url}")
-                except Exception as e:
-                    print(f"Failed to download video {label} from {video_url}: {e}")
+                jobs.append((video_url, filename))
+                labels[filename] = label
             else:
                 print(f"No suitable video file found for video {label} at https://archive.org/download/{item_identifier}")
 
+    # Files are fetched in parallel, each one split into resumable Range segments
+    for video_url, filename, error in segmented_download.download_many(jobs):
+        label = labels[filename]
+        if error is None:
+            print(f"Downloaded video {label} from {video_url}")
+        else:
+            print(f"Failed to download video {label} from {video_url}: {error}")
+
 if __name__ == '__main__':
     main(start_label, end_label)
@@ -0,0 +1,146 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache of https://archive.org/metadata/{identifier} responses
+cache_path = 'output/metadata_cache.sqlite'
+
+# Cached metadata younger than this is used without touching the network
+cache_ttl = 7 * 24 * 3600  # 7 days
+
+# Number of metadata requests in flight at the same time
+max_workers = 8
+
+timeout = 60
+
+# Formats accepted by the "first video file" selection, same as the collection crawler
+video_formats = ['h.264', 'MPEG4', '512Kb MPEG4', 'Ogg Video', 'HiRes MPEG4']
+
+
+class MetadataResolver:
+    """Fetches archive.org item metadata through a pooled session and a SQLite cache.
+
+    Entries younger than `ttl` are served from disk. Older entries are revalidated
+    with If-None-Match when archive.org sent an ETag, and refetched otherwise. If a
+    refresh fails, the stale copy is returned rather than nothing.
+    """
+
+    def __init__(self, cache_path=cache_path, ttl=cache_ttl, workers=max_workers):
+        if os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.ttl = ttl
+        self.workers = workers
+        self.db = sqlite3.connect(cache_path)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS metadata ('
+            'identifier TEXT PRIMARY KEY, etag TEXT, fetched_at REAL NOT NULL, data TEXT NOT NULL)'
+        )
+        self.db.commit()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _cached(self, identifier):
+        row = self.db.execute(
+            'SELECT etag, fetched_at, data FROM metadata WHERE identifier = ?', (identifier,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, fetched_at, data = row
+        return {'etag': etag, 'fetched_at': fetched_at, 'data': json.loads(data)}
+
+    def _store(self, identifier, etag, data):
+        self.db.execute(
+            'INSERT OR REPLACE INTO metadata (identifier, etag, fetched_at, data) VALUES (?, ?, ?, ?)',
+            (identifier, etag, time.time(), json.dumps(data)),
+        )
+
+    def _fetch(self, identifier, etag=None):
+        # Runs on worker threads, so it must not touch the SQLite connection
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = self.session.get(
+                f"https://archive.org/metadata/{identifier}", headers=headers, timeout=timeout
+            )
+        except requests.RequestException as e:
+            logger.warning(f"Failed to fetch metadata for {identifier}: {e}")
+            return None, None, None
+        if response.status_code == 304:
+            return 304, etag, None
+        if response.status_code != 200:
+            logger.warning(f"Metadata request for {identifier} returned {response.status_code}")
+            return response.status_code, None, None
+        try:
+            data = response.json()
+        except ValueError:
+            # An HTML error page instead of JSON, keep whatever is cached
+            logger.warning(f"Metadata for {identifier} wasn't valid JSON")
+            return None, None, None
+        return 200, response.headers.get('ETag'), data
+
+    def get_many(self, identifiers):
+        """Return {identifier: metadata dict or None} for every identifier."""
+        results = {}
+        to_fetch = []
+        now = time.time()
+
+        for identifier in dict.fromkeys(identifiers):
+            cached = self._cached(identifier)
+            if cached and now - cached['fetched_at'] < self.ttl:
+                results[identifier] = cached['data']
+            else:
+                to_fetch.append((identifier, cached))
+
+        if to_fetch:
+            logger.info(f"Fetching metadata for {len(to_fetch)} of {len(results) + len(to_fetch)} items")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                outcomes = executor.map(
+                    lambda job: self._fetch(job[0], job[1]['etag'] if job[1] else None), to_fetch
+                )
+                for (identifier, cached), (status, etag, data) in zip(to_fetch, outcomes):
+                    if status == 304:
+                        self._store(identifier, etag, cached['data'])
+                        results[identifier] = cached['data']
+                    elif status == 200 and data:
+                        # archive.org answers unknown identifiers with an empty object
+                        self._store(identifier, etag, data)
+                        results[identifier] = data
+                    else:
+                        results[identifier] = cached['data'] if cached else None
+            self.db.commit()
+
+        return results
+
+    def get(self, identifier):
+        return self.get_many([identifier])[identifier]
+
+    def close(self):
+        self.db.close()
+        self.session.close()
+
+
+def smallest_mp4_url(item_identifier, metadata):
+    video_files = [file for file in metadata.get('files', []) if file['name'].endswith('.mp4')]
+    if not video_files:
+        return None
+    # Sort video files by size and get the smallest one
+    # Files without a size sort last
+    video_files.sort(key=lambda x: float(x.get('size', math.inf)))
+    return f"https://archive.org/download/{item_identifier}/{video_files[0]['name']}"
+
+
+def first_video_url(item_identifier, metadata):
+    for file in metadata.get('files', []):
+        if file.get('format') in video_formats:
+            return f"https://archive.org/download/{item_identifier}/{file['name']}"
+    return None
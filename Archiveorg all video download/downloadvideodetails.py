@@ -1,7 +1,13 @@
 import os
+import sys
 import json
 import logging
-from internetarchive import search_items, get_item
+from internetarchive import search_items
+import archive_metadata
+
+# Shared helpers used by all the downloader scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from record_sink import RecordSink, read_records, compact
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -11,38 +17,39 @@ logger = logging.getLogger(__name__)
 output_dir = 'output'
 output_file = 'collection_video_details.json'
 
+# Append-only checkpoint written as records arrive, and the crawl position
+checkpoint_file = 'collection_video_details.jsonl'
+state_file = 'crawl_state.json'
+
 # Collection identifier on archive.org
 collection_identifier = 'prelinger'  # Example collection; replace with your actual collection
 
 # Set the starting label number
 start_label = 2993
 
-def fetch_metadata(item_identifier, label):
+# Number of search results whose metadata is fetched concurrently
+batch_size = 100
+
+# Set to True to walk the whole collection again (e.g. to pick up items that failed before)
+full_recrawl = False
+
+def fetch_metadata(item_identifier, label, data):
     try:
-        item = get_item(item_identifier)
-        
+        if not data:
+            raise ValueError("No metadata returned")
+        metadata = data.get('metadata', {})
+
         # Find the correct video URL
-        video_url = None
-        for file in item.files:
-            if file.get('format') in ['h.264', 'MPEG4', '512Kb MPEG4', 'Ogg Video', 'HiRes MPEG4']:
-                video_url = f"https://archive.org/download/{item_identifier}/{file['name']}"
-                break
-        
-        # Handle variations in the video file names
-        if not video_url:
-            for file in item.files:
-                if '3mb' in file['name'] and file.get('format') in ['h.264', 'MPEG4', '512Kb MPEG4', 'Ogg Video', 'HiRes MPEG4']:
-                    video_url = f"https://archive.org/download/{item_identifier}/{file['name']}"
-                    break
+        video_url = archive_metadata.first_video_url(item_identifier, data)
         
         video_details = {
             'Label': label,
             'Identifier': item_identifier,
-            'Title': item.metadata.get('title', 'No Title'),
-            'Description': item.metadata.get('description', 'No Description'),
-            'Tags': item.metadata.get('subject', []),
+            'Title': metadata.get('title', 'No Title'),
+            'Description': metadata.get('description', 'No Description'),
+            'Tags': metadata.get('subject', []),
             'Video URL': video_url if video_url else 'No Video URL Found',
-            'Reviews': item.reviews if hasattr(item, 'reviews') else []
+            'Reviews': data.get('reviews', [])
         }
         
         logger.info(f"Fetched details for video {item_identifier}: {video_details['Title']}")
@@ -51,29 +58,90 @@ def fetch_metadata(item_identifier, label):
         logger.error(f"Failed to fetch metadata for {item_identifier}: {e}")
         return None
 
+def seed_checkpoint(checkpoint_path, output_path):
+    # Carry labels over from a crawl made before checkpoints existed
+    if os.path.exists(checkpoint_path) or not os.path.exists(output_path):
+        return
+    with open(output_path, 'r', encoding='utf-8') as f:
+        video_details_list = json.load(f)
+    with RecordSink(checkpoint_path) as sink:
+        for video_details in video_details_list:
+            sink.append(video_details)
+    logger.info(f"Seeded {checkpoint_path} with {len(video_details_list)} existing records.")
+
+def load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, state_path)
+
 def main():
     # Create directory to save the JSON file
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Fetch metadata for each item in the collection
-    video_details_list = []
-    label = start_label
+    checkpoint_path = os.path.join(output_dir, checkpoint_file)
+    state_path = os.path.join(output_dir, state_file)
+    output_path = os.path.join(output_dir, output_file)
 
-    # Use search_items with pagination
-    search_results = search_items(f'collection:{collection_identifier} AND mediatype:movies')
+    # Labels already handed out are never reassigned
+    seed_checkpoint(checkpoint_path, output_path)
+    records = read_records(checkpoint_path)
+    known_identifiers = {record['Identifier'] for record in records}
+    label = max((record['Label'] for record in records), default=start_label - 1) + 1
+    state = {} if full_recrawl else load_state(state_path)
+    logger.info(f"Resuming with {len(records)} known items, next label {label}.")
 
-    for result in search_results:
-        item_identifier = result['identifier']
-        video_details = fetch_metadata(item_identifier, label)
-        if video_details:
-            video_details_list.append(video_details)
-            label += 1  # Increment the label for the next video
+    # Walk the collection oldest first, so new uploads always land at the end and
+    # only items added since the last crawl need to be listed
+    query = f'collection:{collection_identifier} AND mediatype:movies'
+    if state.get('last_addeddate'):
+        query += f" AND addeddate:[{state['last_addeddate']} TO null]"
+        logger.info(f"Only fetching items added since {state['last_addeddate']} (after {state.get('last_identifier')}).")
+    search_results = search_items(query, fields=['identifier', 'addeddate'], sorts=['addeddate asc'])
+    resolver = archive_metadata.MetadataResolver(os.path.join(output_dir, 'metadata_cache.sqlite'))
+
+    with RecordSink(checkpoint_path) as checkpoint:
+        def process_batch(batch, label):
+            # Fetch the batch concurrently, then assign labels in search order
+            identifiers = [result['identifier'] for result in batch]
+            metadata = resolver.get_many(identifiers)
+            for item_identifier in identifiers:
+                video_details = fetch_metadata(item_identifier, label, metadata[item_identifier])
+                if video_details:
+                    checkpoint.append(video_details)
+                    known_identifiers.add(item_identifier)
+                    label += 1  # Increment the label for the next video
+            checkpoint.sync()
+
+            # Only move the crawl position once the batch is safely on disk
+            last = batch[-1]
+            if last.get('addeddate'):
+                state['last_addeddate'] = last['addeddate']
+            state['last_identifier'] = last['identifier']
+            save_state(state_path, state)
+            return label
+
+        batch = []
+        for result in search_results:
+            if result['identifier'] in known_identifiers:
+                continue
+            batch.append(result)
+            if len(batch) == batch_size:
+                label = process_batch(batch, label)
+                batch = []
+        if batch:
+            label = process_batch(batch, label)
+    resolver.close()
 
     # Save the combined JSON file
-    output_path = os.path.join(output_dir, output_file)
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(video_details_list, f, ensure_ascii=False, indent=4)
+        compact(checkpoint_path, output_path)
         logger.info(f'Saved combined details for all videos to {output_path}.')
     except Exception as e:
         logger.error(f"Failed to save combined JSON: {e}")
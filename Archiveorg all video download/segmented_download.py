@@ -0,0 +1,274 @@
+import os
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+# Number of files downloaded at the same time
+max_workers = 4
+
+# Number of parallel HTTP Range requests per file
+segments_per_file = 4
+
+# Files smaller than this are fetched with a single request
+min_segment_size = 16 * 1024 * 1024  # 16 MB
+
+# Size of the preallocated read/write buffer used by every segment
+buffer_size = 1024 * 1024  # 1 MB
+
+# How often (in bytes per segment) progress is flushed to the .part.json state file
+checkpoint_bytes = 8 * 1024 * 1024  # 8 MB
+
+# How many times a single segment is retried before the file is given up on
+segment_retries = 3
+
+timeout = 60
+
+
+class SharedProgress:
+    """Thread-safe wrapper so every file and segment can report into one tqdm bar."""
+
+    def __init__(self, bar):
+        self.bar = bar
+        self.lock = threading.Lock()
+
+    def add_total(self, n):
+        with self.lock:
+            self.bar.total += n
+            self.bar.refresh()
+
+    def update(self, n):
+        with self.lock:
+            self.bar.update(n)
+
+
+def make_session(pool_size=max_workers * segments_per_file):
+    """Create a requests session whose connection pool fits every worker and segment."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def probe(session, url):
+    """Return (final_url, size, accepts_ranges) for a download URL.
+
+    archive.org redirects /download/ links to a storage node, so the final URL is
+    returned and reused for every segment instead of following the redirect each time.
+    """
+    response = session.head(url, allow_redirects=True, timeout=timeout)
+    head_ok = response.ok
+    final_url = response.url if head_ok else url
+    size = int(response.headers.get('content-length', 0)) if head_ok else 0
+    accepts_ranges = head_ok and response.headers.get('accept-ranges', '').lower() == 'bytes'
+
+    if not size or not accepts_ranges:
+        # Some servers don't answer HEAD properly (or refuse it), ask for the first byte instead
+        response = session.get(final_url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=timeout)
+        response.close()
+        if not head_ok:
+            # Only give up when the GET failed as well
+            response.raise_for_status()
+            final_url = response.url
+        content_range = response.headers.get('content-range', '')
+        if response.status_code == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            if total.isdigit():
+                size = int(total)
+                accepts_ranges = True
+
+    return final_url, size, accepts_ranges
+
+
+def plan_segments(size, segments):
+    count = max(1, min(segments, size // min_segment_size))
+    step = size // count
+    plan = []
+    for i in range(count):
+        start = i * step
+        end = size - 1 if i == count - 1 else start + step - 1
+        plan.append([start, end, 0])  # start, end (inclusive), bytes already written
+    return plan
+
+
+def load_state(state_path, url, size):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A changed source file means the partial data is useless
+    if state.get('url') != url or state.get('size') != size:
+        return None
+    return state
+
+
+def save_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def fetch_segment(session, url, part_path, segment, on_progress):
+    """Download one byte range into its place in the .part file, resuming where it stopped."""
+    start, end, done = segment
+    if start + done > end:
+        return
+
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    headers = {'Range': f'bytes={start + done}-{end}'}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code != 206:
+            raise IOError(f"Expected 206 Partial Content for range {headers['Range']}, got {response.status_code}")
+        response.raw.decode_content = True
+        with open(part_path, 'r+b') as f:
+            f.seek(start + done)
+            unsaved = 0
+            while start + done <= end:
+                n = response.raw.readinto(view)
+                if not n:
+                    break
+                n = min(n, end - (start + done) + 1)
+                f.write(view[:n])
+                done += n
+                unsaved += n
+                on_progress(n)
+                if unsaved >= checkpoint_bytes:
+                    # Only record bytes that have actually reached the file
+                    f.flush()
+                    segment[2] = done
+                    on_progress(0, checkpoint=True)
+                    unsaved = 0
+            f.flush()
+            segment[2] = done
+            on_progress(0, checkpoint=True)
+
+    if start + done <= end:
+        raise IOError(f"Connection closed early for range {headers['Range']}")
+
+
+def fetch_whole(session, url, part_path, on_progress):
+    """Fallback for servers without Range support: one stream, no resume."""
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        with open(part_path, 'wb') as f:
+            while True:
+                n = response.raw.readinto(view)
+                if not n:
+                    break
+                f.write(view[:n])
+                on_progress(n)
+
+
+def download_file(url, filename, session=None, segments=segments_per_file, progress=None):
+    """Download url to filename using parallel Range requests and a resumable .part file.
+
+    Data is written to `filename.part` and its progress to `filename.part.json`; the
+    file is only renamed to `filename` once every segment is complete, so an
+    interrupted run picks up from the last checkpoint.
+    """
+    session = session or make_session(segments)
+    part_path = filename + '.part'
+    state_path = part_path + '.json'
+
+    final_url, size, accepts_ranges = probe(session, url)
+    if progress is not None:
+        progress.add_total(size)
+
+    if size and os.path.exists(filename) and os.path.getsize(filename) == size:
+        if progress is not None:
+            progress.update(size)
+        return filename
+
+    lock = threading.Lock()
+
+    if not size or not accepts_ranges:
+        def on_stream_progress(n, checkpoint=False):
+            if progress is not None:
+                progress.update(n)
+
+        fetch_whole(session, final_url, part_path, on_stream_progress)
+        os.replace(part_path, filename)
+        return filename
+
+    state = load_state(state_path, url, size) if os.path.exists(part_path) else None
+    if state is None:
+        state = {'url': url, 'size': size, 'segments': plan_segments(size, segments)}
+        # Preallocate the whole file so every segment can write at its own offset
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+        save_state(state_path, state)
+    elif progress is not None:
+        progress.update(sum(segment[2] for segment in state['segments']))
+
+    def on_progress(n, checkpoint=False):
+        if progress is not None and n:
+            progress.update(n)
+        if checkpoint:
+            with lock:
+                save_state(state_path, state)
+
+    def run_segment(segment):
+        # Highest offset already counted on the bar. A retry starts again from the last
+        # checkpoint, so the bytes fetched a second time up to here aren't counted again
+        reported = segment[0] + segment[2]
+        offset = reported
+
+        def on_segment_progress(n, checkpoint=False):
+            nonlocal reported, offset
+            offset += n
+            new = max(0, offset - reported)
+            reported = max(reported, offset)
+            on_progress(new, checkpoint)
+
+        for attempt in range(segment_retries):
+            offset = segment[0] + segment[2]
+            try:
+                fetch_segment(session, final_url, part_path, segment, on_segment_progress)
+                return
+            except Exception:
+                if attempt == segment_retries - 1:
+                    raise
+
+    with ThreadPoolExecutor(max_workers=len(state['segments'])) as executor:
+        for future in [executor.submit(run_segment, segment) for segment in state['segments']]:
+            future.result()
+
+    os.replace(part_path, filename)
+    os.remove(state_path)
+    return filename
+
+
+def download_many(jobs, workers=max_workers, segments=segments_per_file):
+    """Download a list of (url, filename) jobs with a bounded worker pool.
+
+    Returns a list of (url, filename, error) in the same order as jobs, where
+    error is None for successful downloads.
+    """
+    session = make_session(workers * segments)
+    results = {}
+
+    with tqdm(desc='Downloading', total=0, unit='iB', unit_scale=True, unit_divisor=1024) as bar:
+        progress = SharedProgress(bar)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_job = {
+                executor.submit(download_file, url, filename, session, segments, progress): (url, filename)
+                for url, filename in jobs
+            }
+            for future in as_completed(future_to_job):
+                url, filename = future_to_job[future]
+                try:
+                    future.result()
+                    results[(url, filename)] = None
+                except Exception as e:
+                    results[(url, filename)] = e
+
+    return [(url, filename, results[(url, filename)]) for url, filename in jobs]
@@ -1,31 +1,111 @@
+import os
+import glob
+import time
+import argparse
+import numpy as np
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
 
 # Load the image
 image_path = "vintagearchive.png"
 output_path = "vintagearchive_white.png"
 
-# Open the image
-image = Image.open(image_path).convert("RGBA")
+# Colors to replace, as (from, to) RGB pairs
+mappings = [((0, 0, 0), (255, 255, 255))]  # Change black to white
 
-# Load pixel data
-pixels = image.load()
+# How far each channel may be from a "from" color and still match (0 = exact)
+tolerance = 0
 
-# Create a new image with the same size and white background
-new_image = Image.new("RGBA", image.size, (255, 255, 255, 0))
-new_pixels = new_image.load()
+# Images recolored at the same time when processing a directory
+workers = os.cpu_count() or 4
 
-# Iterate over each pixel
-for y in range(image.size[1]):
-    for x in range(image.size[0]):
-        r, g, b, a = pixels[x, y]
-        
-        # Change black to white
-        if (r, g, b) == (0, 0, 0):
-            new_pixels[x, y] = (255, 255, 255, a)
+image_extensions = ('*.png', '*.jpg', '*.jpeg', '*.webp', '*.bmp')
+
+
+def pack(color):
+    # RGBA bytes read as one little-endian 32-bit word: R in the low byte, alpha in the high one
+    r, g, b = color
+    return np.uint32(r | g << 8 | b << 16)
+
+
+def recolor(pixels, mappings=mappings, tolerance=tolerance):
+    """Return a copy of an RGBA array with every mapped color replaced, alpha untouched.
+
+    Matching is done against the original colors, so mappings don't chain
+    (black->white, white->red doesn't turn black into red). When several
+    "from" colors match a pixel, the first mapping wins.
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    # Each pixel as a single word, so exact matches and writes are one operation per pixel
+    packed = pixels.view('<u4')[..., 0]
+    rgb = packed & np.uint32(0x00FFFFFF)
+    alpha = packed & np.uint32(0xFF000000)
+    result = packed.copy()
+    taken = np.zeros(packed.shape, bool) if len(mappings) > 1 else None
+    for source, target in mappings:
+        if tolerance:
+            mask = np.ones(packed.shape, bool)
+            for channel, value in enumerate(source):
+                values = pixels[..., channel]
+                mask &= (values >= max(value - tolerance, 0)) & (values <= min(value + tolerance, 255))
         else:
-            new_pixels[x, y] = (r, g, b, a)
+            mask = rgb == pack(source)
+        if taken is not None:
+            mask &= ~taken
+            taken |= mask
+        np.copyto(result, alpha | pack(target), where=mask)
+    return result.view(np.uint8).reshape(pixels.shape)
+
+
+def recolor_file(input_path, output_path, mappings=mappings, tolerance=tolerance):
+    image = Image.open(input_path).convert("RGBA")
+    result = Image.fromarray(recolor(np.asarray(image), mappings, tolerance), "RGBA")
+    if os.path.splitext(output_path)[1].lower() in ('.jpg', '.jpeg'):
+        result = result.convert("RGB")  # JPEG has no alpha channel
+    result.save(output_path)
+    return output_path
+
+
+def _recolor_job(job):
+    return recolor_file(*job)
+
+
+def recolor_directory(input_dir, output_dir, mappings=mappings, tolerance=tolerance, workers=workers):
+    """Recolor every image in input_dir into output_dir, several images at a time."""
+    os.makedirs(output_dir, exist_ok=True)
+    inputs = sorted(path for pattern in image_extensions for path in glob.glob(os.path.join(input_dir, pattern)))
+    jobs = [(path, os.path.join(output_dir, os.path.basename(path)), mappings, tolerance) for path in inputs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_recolor_job, jobs))
+
+
+def parse_color(text):
+    text = text.lstrip('#')
+    if ',' in text:
+        return tuple(int(value) for value in text.split(','))
+    return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def parse_mapping(text):
+    # "000000:ffffff" or "0,0,0:255,255,255"
+    source, target = text.split(':')
+    return parse_color(source), parse_color(target)
+
 
-# Save the new image
-new_image.save(output_path)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replace colors in images, keeping transparency')
+    parser.add_argument('input', nargs='?', default=image_path, help='Image, or directory of images')
+    parser.add_argument('output', nargs='?', default=output_path, help='Output image, or directory for a directory input')
+    parser.add_argument('--map', dest='mappings', action='append', type=parse_mapping,
+                        help='Color mapping such as 000000:ffffff, can be given several times (default black to white)')
+    parser.add_argument('--tolerance', type=int, default=tolerance, help='Per-channel tolerance when matching colors')
+    parser.add_argument('--workers', type=int, default=workers, help='Images processed at once for a directory')
+    args = parser.parse_args()
 
-output_path
+    started = time.perf_counter()
+    if os.path.isdir(args.input):
+        outputs = recolor_directory(args.input, args.output, args.mappings or mappings, args.tolerance, args.workers)
+        print(f"Recolored {len(outputs)} images into {args.output} in {time.perf_counter() - started:.2f}s")
+    else:
+        recolor_file(args.input, args.output, args.mappings or mappings, args.tolerance)
+        print(f"Saved {args.output} in {time.perf_counter() - started:.3f}s")
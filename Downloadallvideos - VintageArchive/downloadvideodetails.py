@@ -1,9 +1,16 @@
 import json
 import os
 import re
+import sys
 import logging
 import yt_dlp
 
+# Shared helpers used by all the downloader scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from download_index import DownloadIndex, index_file
+from record_sink import RecordSink, compact
+import ytdlp_pipeline
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,9 +20,17 @@ channel_url = 'https://www.youtube.com/@vintage-archive/videos'  # Ensure this U
 
 # Path to the JSON file
 output_file = 'output/video_details.json'
+records_file = 'output/video_details.jsonl'  # written as videos finish, compacted into output_file
 download_dir = 'downloaded_videos'
 starting_label = 1  # Specify the starting label
 
+# Path to your ffmpeg binary, None uses the one on PATH
+ffmpeg_location = None
+
+# Number of videos whose details are fetched / downloaded at the same time
+extract_workers = 4
+download_workers = 2
+
 # Function to extract year from text
 def extract_year(text):
     match = re.search(r'\b(19|20)\d{2}\b', text)
@@ -42,68 +57,33 @@ except Exception as e:
     logger.error(f"Failed to fetch video URLs: {e}")
     raise
 
-# Prepare a list to store video details
-videos = []
-
 # Create a directory to save downloaded videos
 os.makedirs(download_dir, exist_ok=True)
 
-# Function to fetch video details with retry logic
-def fetch_video_details(url, retry=False):
-    try:
-        with yt_dlp.YoutubeDL() as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            title = info_dict.get('title', 'No Title')
-            description = info_dict.get('description', 'No Description')
-            keywords = info_dict.get('tags', [])
-            return title, description, keywords
-    except Exception as e:
-        if not retry:
-            logger.warning(f"Retrying for {url} due to error: {e}")
-            return fetch_video_details(url, retry=True)
-        logger.error(f"Error fetching details for {url} after retry: {e}")
-        return None, None, None
-
-# Loop through the video URLs and extract details
-for idx, url in enumerate(video_urls, start=1):
-    if idx < starting_label:
-        continue
+# Function to get the next available label, used while the index is still empty
+def get_next_file_number():
+    existing_files = [f for f in os.listdir(download_dir) if f.endswith('.mp4') and f.split('.')[0].isdigit()]
+    return max([int(f.split('.')[0]) for f in existing_files], default=starting_label - 1) + 1
 
-    title, description, keywords = fetch_video_details(url)
-    if title is None or description is None:
-        continue  # Skip this video if fetching details failed
+# Skip videos fetched on an earlier run; the directory is only scanned while the index is empty
+index = DownloadIndex(os.path.join(download_dir, index_file))
+if not len(index) and os.path.exists(output_file):
+    with open(output_file, 'r', encoding='utf-8') as f:
+        index.seed_from_records(json.load(f), download_dir)
+new_urls = index.filter_new(video_urls)
+logger.info(f"{len(video_urls) - len(new_urls)} videos already downloaded, {len(new_urls)} new.")
 
-    try:
-        # Generate a filename based on the label ID
-        download_path = os.path.join(download_dir, f'{idx}.mp4')
-        
-        # Download the video and save with the label ID as the filename
-        ydl_opts = {
-            'outtmpl': download_path,
-            'format': 'best'
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        
-        video_details = {
-            'Label': idx,
-            'Video URL': url,
-            'Title': title,
-            'Description': description,
-            'Tags': keywords
-        }
-        videos.append(video_details)
-        logger.info(f'Fetched details for video {idx}: {title}')
-    except Exception as e:
-        logger.error(f'Error downloading video for {url}: {e}')
-        continue
+# Labels continue after the highest one handed out and only go to videos that downloaded, never
+# to a label whose file already exists. Each record is on disk as soon as its video is
+with RecordSink(records_file) as sink:
+    ytdlp_pipeline.run_pipeline(new_urls, download_dir, index.next_label(get_next_file_number), ffmpeg_location,
+                                extract_workers=extract_workers, download_workers=download_workers,
+                                on_record=sink.append, index=index)
 
 # Save the video details to a JSON file in the custom directory
-os.makedirs('output', exist_ok=True)
-
 try:
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=4)
+    videos = compact(records_file, output_file, merge=True)
+    os.remove(records_file)
     logger.info(f'Saved details for {len(videos)} videos to {output_file}.')
 except Exception as e:
     logger.error(f"Failed to save JSON: {e}")
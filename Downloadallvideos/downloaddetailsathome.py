@@ -1,8 +1,14 @@
 import json
 import os
+import sys
 import logging
 import yt_dlp
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Shared helpers used by all the downloader scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from download_index import DownloadIndex, index_file
+from record_sink import RecordSink, compact
+import ytdlp_pipeline
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,8 +17,11 @@ logger = logging.getLogger(__name__)
 # Configuration
 channel_url = 'https://www.youtube.com/playlist?list=PLttOfW_IF8oudzC4YAqlrHjF2E2_mOX9c'
 output_file = 'output/video_details.json'
+records_file = 'output/video_details.jsonl'  # written as videos finish, compacted into output_file
 download_dir = 'M:/Youtube/MovieChannel/'
 ffmpeg_location = 'c:/ffmpeg/ffmpeg-master-latest-win64-gpl/ffmpeg-master-latest-win64-gpl/bin/ffmpeg.exe'
+extract_workers = 4  # URLs whose details are fetched at the same time
+download_workers = 2  # videos downloaded at the same time
 
 def get_next_file_number():
     existing_files = [f for f in os.listdir(download_dir) if f.endswith('.mp4')]
@@ -24,58 +33,8 @@ def get_video_urls(handle_url):
         result = ydl.extract_info(handle_url, download=False)
         return [entry['url'] for entry in result.get('entries', [])]
 
-def fetch_video_details(url, retries=3):
-    for attempt in range(retries):
-        try:
-            with yt_dlp.YoutubeDL() as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                return {
-                    'title': info_dict.get('title', 'No Title'),
-                    'description': info_dict.get('description', 'No Description'),
-                    'keywords': info_dict.get('tags', [])
-                }
-        except Exception as e:
-            logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-    logger.error(f"Failed to fetch details for {url} after {retries} attempts")
-    return None
-
-def download_video(url, file_number):
-    download_path = os.path.join(download_dir, f'{file_number}.%(ext)s')
-    ydl_opts = {
-        'outtmpl': download_path,
-        'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best[ext=mp4]/best',
-        'ffmpeg_location': ffmpeg_location,
-        'postprocessors': [{'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4'}],
-        'retries': 5,
-        'fragment_retries': 5,
-        'continuedl': True,
-    }
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return True
-    except Exception as e:
-        logger.error(f"Error downloading video {file_number}: {e}")
-        return False
-
-def process_video(url, file_number):
-    details = fetch_video_details(url)
-    if not details:
-        return None
-
-    if download_video(url, file_number):
-        return {
-            'Label': file_number,
-            'Video URL': url,
-            'Title': details['title'],
-            'Description': details['description'],
-            'Tags': details['keywords']
-        }
-    return None
-
 def main():
     os.makedirs(download_dir, exist_ok=True)
-    os.makedirs('output', exist_ok=True)
 
     try:
         video_urls = get_video_urls(channel_url)
@@ -84,22 +43,26 @@ def main():
         logger.error(f"Failed to fetch video URLs: {e}")
         return
 
-    file_number = get_next_file_number()
-    videos = []
+    # Skip videos fetched on an earlier run; the directory is only scanned while the index is empty
+    index = DownloadIndex(os.path.join(download_dir, index_file))
+    if not len(index) and os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            index.seed_from_records(json.load(f), download_dir)
+    new_urls = index.filter_new(video_urls)
+    logger.info(f"{len(video_urls) - len(new_urls)} videos already downloaded, {len(new_urls)} new.")
+    file_number = index.next_label(get_next_file_number)
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_url = {executor.submit(process_video, url, file_number + i): url 
-                         for i, url in enumerate(video_urls)}
-        
-        for future in as_completed(future_to_url):
-            result = future.result()
-            if result:
-                videos.append(result)
-                logger.info(f"Successfully processed video: {result['Title']}")
+    # Labels are only handed out to videos that actually downloaded; each record is
+    # on disk as soon as its video is, and a crashed run's records carry over
+    with RecordSink(records_file) as sink:
+        ytdlp_pipeline.run_pipeline(new_urls, download_dir, file_number, ffmpeg_location,
+                                    extract_workers=extract_workers, download_workers=download_workers,
+                                    on_record=sink.append, index=index)
 
+    # Save the video details to a JSON file in the custom directory
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(videos, f, ensure_ascii=False, indent=4)
+        videos = compact(records_file, output_file, merge=True)
+        os.remove(records_file)
         logger.info(f'Saved details for {len(videos)} videos to {output_file}.')
     except Exception as e:
         logger.error(f"Failed to save JSON: {e}")
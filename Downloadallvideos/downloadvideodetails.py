@@ -1,8 +1,15 @@
 import json
 import os
+import sys
 import logging
 import yt_dlp
 
+# Shared helpers used by all the downloader scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from download_index import DownloadIndex, index_file
+from record_sink import RecordSink, compact
+import ytdlp_pipeline
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,11 +19,16 @@ channel_url = 'https://www.youtube.com/playlist?list=PLttOfW_IF8oudzC4YAqlrHjF2E
 
 # Path to the JSON file
 output_file = 'output/video_details.json'
+records_file = 'output/video_details.jsonl'  # written as videos finish, compacted into output_file
 download_dir = 'M:/Youtube/MovieChannel'
 
 # Path to your ffmpeg binary
 ffmpeg_location = 'c:/ffmpeg/ffmpeg-master-latest-win64-gpl/ffmpeg-master-latest-win64-gpl/bin/ffmpeg.exe'  # Replace with your actual path
 
+# Number of videos whose details are fetched / downloaded at the same time
+extract_workers = 4
+download_workers = 2
+
 # Function to get the next available file number
 def get_next_file_number():
     existing_files = [f for f in os.listdir(download_dir) if f.endswith('.mp4')]
@@ -37,84 +49,41 @@ def get_video_urls(handle_url):
             return [entry['url'] for entry in result['entries']]
     raise ValueError("Failed to fetch video URLs")
 
-try:
-    video_urls = get_video_urls(channel_url)
-    logger.info(f"Found {len(video_urls)} videos.")
-except Exception as e:
-    logger.error(f"Failed to fetch video URLs: {e}")
-    raise
-
-# Prepare a list to store video details
-videos = []
-
-# Create a directory to save downloaded videos
-os.makedirs(download_dir, exist_ok=True)
-
-# Function to fetch video details with retry logic
-def fetch_video_details(url, retry=False):
+def main():
     try:
-        with yt_dlp.YoutubeDL() as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            title = info_dict.get('title', 'No Title')
-            description = info_dict.get('description', 'No Description')
-            keywords = info_dict.get('tags', [])
-            return title, description, keywords
+        video_urls = get_video_urls(channel_url)
+        logger.info(f"Found {len(video_urls)} videos.")
     except Exception as e:
-        if not retry:
-            logger.warning(f"Retrying for {url} due to error: {e}")
-            return fetch_video_details(url, retry=True)
-        logger.error(f"Error fetching details for {url} after retry: {e}")
-        return None, None, None
+        logger.error(f"Failed to fetch video URLs: {e}")
+        raise
+
+    # Create a directory to save downloaded videos
+    os.makedirs(download_dir, exist_ok=True)
 
-# Get the starting file number
-file_number = get_next_file_number()
+    # Skip videos fetched on an earlier run; the directory is only scanned while the index is empty
+    index = DownloadIndex(os.path.join(download_dir, index_file))
+    if not len(index) and os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            index.seed_from_records(json.load(f), download_dir)
+    new_urls = index.filter_new(video_urls)
+    logger.info(f"{len(video_urls) - len(new_urls)} videos already downloaded, {len(new_urls)} new.")
+    file_number = index.next_label(get_next_file_number)
 
-# Loop through the video URLs and extract details
-for url in video_urls:
-    title, description, keywords = fetch_video_details(url)
-    if not title or not description:
-        continue  # Skip this video if fetching details failed
+    # Extract each URL once and download it, labels are assigned in playlist order on success.
+    # Each record is on disk as soon as its video is, and a crashed run's records carry over
+    with RecordSink(records_file) as sink:
+        ytdlp_pipeline.run_pipeline(new_urls, download_dir, file_number, ffmpeg_location,
+                                    extract_workers=extract_workers, download_workers=download_workers,
+                                    on_record=sink.append, index=index)
 
+    # Save the video details to a JSON file in the custom directory
     try:
-        # Generate a filename based on the next available number
-        download_path = os.path.join(download_dir, f'{file_number}.%(ext)s')
-        
-        # Download the video and save with the sequential number as the filename
-        ydl_opts = {
-            'outtmpl': download_path,
-            'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best[ext=mp4]/best',
-            'ffmpeg_location': ffmpeg_location,
-            'postprocessors': [{
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',
-            }],
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        
-        video_details = {
-            'Label': file_number,
-            'Video URL': url,
-            'Title': title,
-            'Description': description,
-            'Tags': keywords
-        }
-        videos.append(video_details)
-        logger.info(f'Downloaded video {file_number}: {title}')
-        
-        # Increment the file number for the next video
-        file_number += 1
+        videos = compact(records_file, output_file, merge=True)
+        os.remove(records_file)
+        logger.info(f'Saved details for {len(videos)} videos to {output_file}.')
     except Exception as e:
-        logger.error(f'Error downloading video for {url}: {e}')
-        continue
-
-# Save the video details to a JSON file in the custom directory
-os.makedirs('output', exist_ok=True)
+        logger.error(f"Failed to save JSON: {e}")
+        raise
 
-try:
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=4)
-    logger.info(f'Saved details for {len(videos)} videos to {output_file}.')
-except Exception as e:
-    logger.error(f"Failed to save JSON: {e}")
-    raise
\ No newline at end of file
+if __name__ == "__main__":
+    main()
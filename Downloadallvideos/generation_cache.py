@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# On-disk cache of generated titles and descriptions
+cache_file = 'output/generation_cache.sqlite'
+
+# Least recently used entries are evicted past this many
+max_entries = 50000
+
+
+class GenerationCache:
+    """Persistent cache of LLM outputs keyed by a hash of everything that shapes them.
+
+    The key covers the prompt template, model, temperature and the original
+    title, description and year, so re-running after a crash or on unchanged
+    videos costs nothing, while a prompt tweak only misses for that prompt.
+    """
+
+    def __init__(self, path=cache_file, max_entries=max_entries):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS generations ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)')
+        self.db.commit()
+
+    @staticmethod
+    def make_key(template, model, temperature, title, description, year=None):
+        payload = json.dumps([template, model, temperature, title, description, year], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        row = self.db.execute('SELECT value FROM generations WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute('UPDATE generations SET last_used = ? WHERE key = ?', (time.time(), key))
+        self.db.commit()
+        return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        self.db.execute(
+            'INSERT OR REPLACE INTO generations (key, value, created_at, last_used) VALUES (?, ?, ?, ?)',
+            (key, value, now, now),
+        )
+        count = self.db.execute('SELECT COUNT(*) FROM generations').fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute(
+                'DELETE FROM generations WHERE key IN '
+                '(SELECT key FROM generations ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,),
+            )
+        self.db.commit()
+
+    def stats(self):
+        entries = self.db.execute('SELECT COUNT(*) FROM generations').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def close(self):
+        self.db.close()
@@ -1,8 +1,12 @@
+import os
 import json
 import re
+import asyncio
 import logging
 import openai
 from pathlib import Path
+import rewrite_engine
+from generation_cache import GenerationCache
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +18,12 @@ openai.api_key = 'sk-proj-m1VUttsLHSPjw2m1qdVgT3BlbkFJr02QGO0upljypEtgXyWi'  # R
 # Paths to JSON files
 input_file = 'output/video_details.json'
 output_file = 'output/updated_video_details.json'
+checkpoint_file = 'output/updated_video_details.jsonl'  # finished rewrites, so a crashed run can resume
+
+# Ask for title, description (and tags) in one JSON response instead of two requests per video
+combined_generation = True
+# In combined mode, also ask the model for search tags to add after the meta tags
+generate_tags = False
 
 # Hardcoded schedule date
 schedule_date = "2024-08-15 00:00:00"  # Replace with your desired date
@@ -27,49 +37,88 @@ def extract_year(text):
     match = re.search(r'\b(19|20)\d{2}\b', text)
     return match.group(0) if match else None
 
+# Prompt templates, part of the cache key so editing one regenerates only what it affects
+TITLE_PROMPT = "Generate a compelling, click-worthy title for a YouTube video based on the following title and description: Title: {title} Description: {description}"
+TITLE_YEAR_PROMPT = " Include the year {year} in the title."
+DESCRIPTION_PROMPT = "Write a new, engaging, and informative YouTube video description based on the following title and description: Title: {title} Description: {description}"
+COMBINED_PROMPT = "Write a compelling, click-worthy title and a new, engaging, and informative description for a YouTube video based on the following title and description: Title: {title} Description: {description}"
+COMBINED_YEAR_PROMPT = " Include the year {year} in the title."
+COMBINED_TAGS_PROMPT = ' Also include a "tags" key with a list of up to 15 short search tags.'
+COMBINED_FORMAT_PROMPT = ' Respond with only a JSON object with the keys "title" and "description". The title must be at most 100 characters and the description at most 5000 characters.'
+
+# Generated text is cached, so reruns only pay for new or changed videos
+cache = GenerationCache()
+
+# Runs the OpenAI requests concurrently within the account's rate limits
+engine = rewrite_engine.RewriteEngine(cache=cache)
+
 # Function to get new title from OpenAI GPT model
-def get_new_title(original_title, description, year=None):
-    prompt = f"Generate a compelling, click-worthy title for a YouTube video based on the following title and description: Title: {original_title} Description: {description}"
+async def get_new_title(original_title, description, year=None):
+    prompt = TITLE_PROMPT.format(title=original_title, description=description)
     if year:
-        prompt += f" Include the year {year} in the title."
+        prompt += TITLE_YEAR_PROMPT.format(year=year)
     
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=20,
-            temperature=0.8  # Increase creativity
-        )
-        new_title = response['choices'][0]['message']['content'].strip()
-        return new_title if len(new_title) <= 100 else new_title[:97] + "..."  # Truncate and add ellipsis if title exceeds 100 characters
-    except Exception as e:
-        logger.error(f"Error generating new title: {e}")
-        return "Error in generating title"
+    key = cache.make_key(TITLE_PROMPT + TITLE_YEAR_PROMPT, engine.model, 0.8, original_title, description, year)
+    new_title = await engine.complete(prompt, max_tokens=20, temperature=0.8, cache_key=key)  # Increase creativity
+    return truncate_title(new_title)
 
 # Function to get new description from OpenAI GPT model
-def get_new_description(original_title, original_description):
-    prompt = f"Write a new, engaging, and informative YouTube video description based on the following title and description: Title: {original_title} Description: {original_description}"
+async def get_new_description(original_title, original_description):
+    prompt = DESCRIPTION_PROMPT.format(title=original_title, description=original_description)
     
+    key = cache.make_key(DESCRIPTION_PROMPT, engine.model, 0.7, original_title, original_description)
+    new_description = await engine.complete(prompt, max_tokens=500, temperature=0.7, cache_key=key)  # Allow more tokens for longer descriptions
+    return truncate_description(new_description)
+
+# Function to get new title, description and optionally tags from a single request
+async def get_new_title_and_description(original_title, original_description, year=None):
+    prompt = COMBINED_PROMPT.format(title=original_title, description=original_description)
+    template = COMBINED_PROMPT
+    if year:
+        prompt += COMBINED_YEAR_PROMPT.format(year=year)
+        template += COMBINED_YEAR_PROMPT
+    if generate_tags:
+        prompt += COMBINED_TAGS_PROMPT
+        template += COMBINED_TAGS_PROMPT
+    prompt += COMBINED_FORMAT_PROMPT
+    template += COMBINED_FORMAT_PROMPT
+
+    key = cache.make_key(template, engine.model, 0.7, original_title, original_description, year)
+    content = await engine.complete(prompt, max_tokens=600, temperature=0.7, cache_key=key,
+                                    validate=parse_combined)
+    result = parse_combined(content)
+    if result is not None and not generate_tags:
+        result = result[0], result[1], []
+    return result
+
+# Returns (title, description, tags) from a combined response, or None if it isn't usable
+def parse_combined(content):
+    match = re.search(r'\{.*\}', content, re.DOTALL)  # Models sometimes wrap the JSON in a code fence
+    if not match:
+        return None
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,  # Allow more tokens for longer descriptions
-            temperature=0.7
-        )
-        new_description = response['choices'][0]['message']['content'].strip()
-        if len(new_description) > 5000:
-            new_description = new_description[:4997] + "..."  # Truncate and add ellipsis if description exceeds 5000 characters
-        return new_description
-    except Exception as e:
-        logger.error(f"Error generating new description: {e}")
-        return "Error in generating description"
+        result = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(result, dict):
+        return None
+    title = result.get('title')
+    description = result.get('description')
+    if not isinstance(title, str) or not isinstance(description, str) or not title.strip() or not description.strip():
+        return None
+    tags = result.get('tags') or []
+    if not isinstance(tags, list):
+        tags = []
+    tags = [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()]
+    return truncate_title(title.strip()), truncate_description(description.strip()), tags
+
+def truncate_title(title):
+    return title if len(title) <= 100 else title[:97] + "..."  # Truncate and add ellipsis if title exceeds 100 characters
+
+def truncate_description(description):
+    if len(description) > 5000:
+        description = description[:4997] + "..."  # Truncate and add ellipsis if description exceeds 5000 characters
+    return description
 
 # Contact information to be added at the end of each description
 contact_information = """
@@ -88,28 +137,45 @@ except Exception as e:
     raise
 
 # Update titles, descriptions, and add schedule and meta tags
-for video in videos:
-    try:
-        original_title = video['Title']
-        original_description = video['Description']
-        year = extract_year(original_description)
-        new_title = get_new_title(original_title, original_description, year)
-        new_description = get_new_description(original_title, original_description)
-        
-        video['Title'] = new_title
-        video['Description'] = f"{new_description}\n\n{contact_information}"
-        video['Tags'] = meta_tags
-        video['Schedule'] = schedule_date
-        
-        logger.info(f"Updated video {video['Label']}: {new_title}")
-    except Exception as e:
-        logger.error(f"Error updating video {video['Label']}: {e}")
+async def update_video(video):
+    original_title = video['Title']
+    original_description = video['Description']
+    year = extract_year(original_description)
+    result = None
+    if combined_generation:
+        result = await get_new_title_and_description(original_title, original_description, year)
+        if result is None:
+            logger.warning(f"Unparseable combined response for video {video['Label']}, generating fields separately")
+    if result is not None:
+        new_title, new_description, new_tags = result
+    else:
+        new_title, new_description = await asyncio.gather(
+            get_new_title(original_title, original_description, year),
+            get_new_description(original_title, original_description)
+        )
+        new_tags = []
+    
+    video = dict(video)
+    video['Title'] = new_title
+    video['Description'] = f"{new_description}\n\n{contact_information}"
+    video['Tags'] = meta_tags + [tag for tag in new_tags if tag not in meta_tags]
+    video['Schedule'] = schedule_date
+    
+    logger.info(f"Updated video {video['Label']}: {new_title}")
+    return video
+
+videos = engine.run(videos, update_video, checkpoint_file)
+
+stats = cache.stats()
+logger.info(f"Generation cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries.")
+cache.close()
 
 # Save updated video details to JSON file
 try:
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(videos, f, ensure_ascii=False, indent=4)
     logger.info(f"Saved updated details for {len(videos)} videos to {output_file}.")
+    os.remove(checkpoint_file)
 except Exception as e:
     logger.error(f"Failed to save JSON: {e}")
     raise
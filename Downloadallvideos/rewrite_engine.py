@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+import openai
+
+# Shared helpers used by all the downloader scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from record_sink import RecordSink, read_records
+
+logger = logging.getLogger(__name__)
+
+model = "gpt-3.5-turbo"
+
+# Budgets for the account tier; requests wait instead of hitting 429s
+requests_per_minute = 3500
+tokens_per_minute = 90000
+
+# Number of videos being rewritten at the same time
+concurrency = 20
+
+max_retries = 6
+base_backoff = 1.0  # seconds
+max_backoff = 60.0
+
+# Point this at a local fake completion server (e.g. 'http://127.0.0.1:8000/v1') for testing
+api_base = os.environ.get('OPENAI_API_BASE')
+
+retryable_errors = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    openai.error.TryAgain,
+)
+
+
+def estimate_tokens(prompt, max_tokens):
+    # Roughly 4 characters per token for English text, plus the completion budget
+    return len(prompt) // 4 + max_tokens
+
+
+class RateLimiter:
+    """Keeps requests and tokens within per-minute budgets over a sliding 60 second window."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.events = deque()  # (timestamp, tokens)
+        self.tokens_in_window = 0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        # Waiters queue on the lock, so requests go out in the order they asked
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.events and now - self.events[0][0] >= 60:
+                    self.tokens_in_window -= self.events.popleft()[1]
+                if not self.events or (
+                    len(self.events) < self.requests_per_minute
+                    and self.tokens_in_window + tokens <= self.tokens_per_minute
+                ):
+                    self.events.append((now, tokens))
+                    self.tokens_in_window += tokens
+                    return
+                await asyncio.sleep(60 - (now - self.events[0][0]))
+
+
+class RewriteEngine:
+    """Runs chat completions concurrently under a rate budget, checkpointing every rewritten record."""
+
+    def __init__(self, model=model, requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute,
+                 concurrency=concurrency, max_retries=max_retries, api_base=api_base, cache=None):
+        self.model = model
+        self.cache = cache  # optional GenerationCache
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.api_base = api_base
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    async def complete(self, prompt, max_tokens, temperature, cache_key=None, validate=None):
+        """Return the stripped completion for prompt, retrying transient errors with jittered backoff.
+
+        With a cache_key and a cache, a stored completion is returned without a request.
+        With validate, a completion is only stored or reused when validate(content)
+        is truthy, so a malformed response is asked for again on the next run.
+        """
+        if cache_key and self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None and (validate is None or validate(cached)):
+                return cached
+        content = await self._request(prompt, max_tokens, temperature)
+        if cache_key and self.cache is not None and (validate is None or validate(content)):
+            self.cache.put(cache_key, content)
+        return content
+
+    async def _request(self, prompt, max_tokens, temperature):
+        kwargs = {'api_base': self.api_base} if self.api_base else {}
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire(estimate_tokens(prompt, max_tokens))
+            try:
+                response = await openai.ChatCompletion.acreate(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs
+                )
+                return response['choices'][0]['message']['content'].strip()
+            except retryable_errors as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                # Full jitter, so a burst of 429s doesn't retry in lockstep
+                delay = random.uniform(0, min(max_backoff, base_backoff * 2 ** attempt))
+                logger.warning(f"Completion failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def rewrite_all(self, videos, rewrite, checkpoint_file):
+        """Apply the async rewrite(video) -> video to every video.
+
+        Records already in checkpoint_file (from an interrupted run) are reused.
+        Every new result is appended to it as soon as it is ready. Videos whose
+        rewrite fails are returned unchanged and left out of the checkpoint, so
+        the next run tries them again.
+        """
+        done = {record['Label']: record for record in read_records(checkpoint_file)}
+        if done:
+            logger.info(f"Resuming, {len(done)} videos already rewritten in {checkpoint_file}.")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with RecordSink(checkpoint_file) as sink:
+            async def worker(video):
+                async with semaphore:
+                    try:
+                        updated = await rewrite(video)
+                    except Exception as e:
+                        logger.error(f"Error updating video {video['Label']}: {e}")
+                        return video
+                sink.append(updated)
+                return updated
+
+            todo = [video for video in videos if video['Label'] not in done]
+            results = await asyncio.gather(*(worker(video) for video in todo))
+
+        updated = {video['Label']: video for video in results}
+        updated.update(done)
+        return [updated.get(video['Label'], video) for video in videos]
+
+    def run(self, videos, rewrite, checkpoint_file):
+        return asyncio.run(self.rewrite_all(videos, rewrite, checkpoint_file))
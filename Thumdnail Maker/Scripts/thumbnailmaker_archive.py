@@ -1,7 +1,13 @@
 import os
+import sys
 import cv2
 from PIL import Image, ImageEnhance, ImageDraw, ImageFont, ImageFilter, ImageOps
 
+# Shared helpers live in the Thumdnail Maker folder above this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gradients import add_gradient
+from asset_cache import load_font
+
 def capture_screenshot(video_path, time=20):
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS)
@@ -25,23 +31,6 @@ def enhance_image(image):
     image = enhancer.enhance(1.0)  # Slightly increase brightness
     return image
 
-def add_gradient(image, direction='horizontal'):
-    width, height = image.size
-    gradient = Image.new('L', (width, height), color=0xFF)
-
-    for x in range(width):
-        for y in range(height):
-            if direction == 'horizontal':
-                gradient.putpixel((x, y), int(255 * (1 - x / width)))
-            else:
-                gradient.putpixel((x, y), int(255 * (1 - y / height)))
-
-    alpha_gradient = gradient.convert('L')
-    gradient_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    gradient_image.putalpha(alpha_gradient)
-    
-    return Image.alpha_composite(image.convert('RGBA'), gradient_image)
-
 def create_thumbnail_with_effect(image, output_path, text="Rediscover The Past", font_path="Berylium.ttf"):
     image = enhance_image(image)
 
@@ -56,7 +45,7 @@ def create_thumbnail_with_effect(image, output_path, text="Rediscover The Past",
     draw = ImageDraw.Draw(image)
     
     try:
-        font = ImageFont.truetype(font_path, 150)  # Increased font size
+        font = load_font(font_path, 150)  # Increased font size
     except IOError:
         print(f"Font at {font_path} not found. Using default font.")
         font = ImageFont.load_default()
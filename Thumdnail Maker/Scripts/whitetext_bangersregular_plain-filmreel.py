@@ -1,8 +1,13 @@
 import os
+import sys
 import cv2
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageOps
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from detector import get_detector
+from asset_cache import load_font, load_overlay
+
 def capture_screenshot(video_path, time=20):
     print(f"Capturing screenshot from {video_path} at {time} seconds.")
     cap = cv2.VideoCapture(video_path)
@@ -18,52 +23,16 @@ def capture_screenshot(video_path, time=20):
         return None
 
 def detect_object(image, config_path, weights_path, classes_path):
-    print("Loading YOLO model.")
-    net = cv2.dnn.readNet(weights_path, config_path)
-    with open(classes_path, 'r') as f:
-        classes = f.read().strip().split('\n')
-    print(f"Classes loaded: {classes}")
-
-    layer_names = net.getLayerNames()
-    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
-
+    # The model is loaded once per run and shared by every thumbnail
+    detector = get_detector(config_path, weights_path, classes_path)
     image_np = np.array(image)
-    height, width, channels = image_np.shape
     print(f"Image shape: {image_np.shape}")
 
-    blob = cv2.dnn.blobFromImage(image_np, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-    net.setInput(blob)
-    outs = net.forward(output_layers)
-
-    class_ids = []
-    confidences = []
-    boxes = []
-
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            if confidence > 0.5:
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-
-    indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
-    indices = list(indices.flatten()) if len(indices) > 0 else []
-
-    print(f"Boxes: {boxes}")
-    print(f"Confidences: {confidences}")
-    print(f"Indices: {indices}")
-
-    if len(indices) > 0:
-        largest_box = boxes[indices[0]]
+    detections = detector.detect([image_np])[0]
+    print(f"Detections: {[(box, round(confidence, 3), detector.label(class_id)) for box, confidence, class_id in detections]}")
+
+    if detections:
+        largest_box = detections[0][0]
         print(f"Largest box: {largest_box}")
         return largest_box
 
@@ -128,7 +97,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
     draw = ImageDraw.Draw(image)
     try:
         font_size = 120  # Change this value to adjust the font size
-        font = ImageFont.truetype(font_path, font_size)  # Adjusted font size
+        font = load_font(font_path, font_size)  # Adjusted font size
         print(f"Font loaded: {font_path} with size {font_size}")
     except IOError:
         print(f"Font at {font_path} not found. Using default font.")
@@ -148,8 +117,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
 
     # Add the subscribe button image to the top right
     try:
-        subscribe_image = Image.open(subscribe_image_path).convert("RGBA")
-        subscribe_image = subscribe_image.resize((300, 200), Image.LANCZOS)
+        subscribe_image = load_overlay(subscribe_image_path, (300, 200))
         subscribe_position = (image.width - subscribe_image.width - 20, 20)
         image.paste(subscribe_image, subscribe_position, subscribe_image)
         print("Subscribe button added.")
@@ -158,8 +126,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
 
     # Add the vintage archive image to the bottom right
     try:
-        vintagearchive_image = Image.open(vintagearchive_image_path).convert("RGBA")
-        vintagearchive_image = vintagearchive_image.resize((300, 300), Image.LANCZOS)
+        vintagearchive_image = load_overlay(vintagearchive_image_path, (300, 300))
         vintagearchive_position = (image.width - vintagearchive_image.width - 20, image.height - vintagearchive_image.height - 20)
         image.paste(vintagearchive_image, vintagearchive_position, vintagearchive_image)
         print("Vintage archive button added.")
@@ -1,8 +1,13 @@
 import os
+import sys
 import cv2
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageOps
 import numpy as np
 
+# Shared helpers live in the Thumdnail Maker folder above this one
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from asset_cache import load_font, load_overlay
+
 def capture_screenshot(video_path, time=20):
     print(f"Capturing screenshot from {video_path} at {time} seconds.")
     cap = cv2.VideoCapture(video_path)
@@ -132,7 +137,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
     draw = ImageDraw.Draw(image)
     try:
         font_size = 120  # Change this value to adjust the font size
-        font = ImageFont.truetype(font_path, font_size)  # Adjusted font size
+        font = load_font(font_path, font_size)  # Adjusted font size
         print(f"Font loaded: {font_path} with size {font_size}")
     except IOError:
         print(f"Font at {font_path} not found. Using default font.")
@@ -152,8 +157,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
 
     # Add the subscribe button image to the top right
     try:
-        subscribe_image = Image.open(subscribe_image_path).convert("RGBA")
-        subscribe_image = subscribe_image.resize((150, 150), Image.LANCZOS)
+        subscribe_image = load_overlay(subscribe_image_path, (150, 150))
         subscribe_position = (image.width - subscribe_image.width - 20, 20)
         image.paste(subscribe_image, subscribe_position, subscribe_image)
         print("Subscribe button added.")
@@ -162,8 +166,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
 
     # Add the irish image to the top left
     try:
-        irish1_image = Image.open(irish1_image_path).convert("RGBA")
-        irish1_image = irish1_image.resize((300, 300), Image.LANCZOS)
+        irish1_image = load_overlay(irish1_image_path, (300, 300))
         irish1_position = (20, 20)
         image.paste(irish1_image, irish1_position, irish1_image)
         print("Irish image added.")
@@ -0,0 +1,62 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageFont
+
+# Loaded fonts and decoded overlays kept per process, least recently used dropped first
+max_entries = 64
+
+
+class AssetCache:
+    """Fonts and resized RGBA overlays keyed by (path, size, mtime), so each is loaded once per process.
+
+    Cached overlays are shared, paste them but don't draw on them.
+    """
+
+    def __init__(self, max_entries=max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, kind, path, size, load):
+        # A missing file keeps no mtime, fonts are then looked up by name by PIL
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        key = (kind, os.path.abspath(path), size, mtime)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        value = load()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def font(self, path, size):
+        return self._get('font', path, size, lambda: ImageFont.truetype(path, size))
+
+    def overlay(self, path, size=None):
+        """The image at path as RGBA, resized with LANCZOS when size is given."""
+        def load():
+            image = Image.open(path).convert("RGBA")
+            return image.resize(tuple(size), Image.LANCZOS) if size else image
+        return self._get('overlay', path, tuple(size) if size else None, load)
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+assets = AssetCache()
+
+
+def load_font(path, size):
+    return assets.font(path, size)
+
+
+def load_overlay(path, size=None):
+    return assets.overlay(path, size)
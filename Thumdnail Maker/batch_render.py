@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from PIL import Image
+import thumbnail_engine
+
+# Rendered and failed thumbnails with their timings, keyed by output path and rewritten after every label
+manifest_file = 'render_manifest.json'
+
+# Number of thumbnails rendered at the same time
+workers = os.cpu_count() or 4
+
+# Compiled once per worker process by init_worker
+worker_plan = None
+worker_cache = None
+worker_error = None
+
+
+def find_videos(start_label, end_label, video_dir):
+    videos = []
+    for label in range(start_label, end_label + 1):
+        video_path = os.path.join(video_dir, f"{label}.mp4")
+        if os.path.exists(video_path):
+            videos.append((label, video_path))
+        else:
+            print(f"Video {video_path} not found")
+    return videos
+
+
+def is_up_to_date(video_path, output_path, spec_path):
+    # The thumbnail only counts as current if it is newer than both the video and the template
+    if not os.path.exists(output_path):
+        return False
+    return os.path.getmtime(output_path) >= max(os.path.getmtime(video_path), os.path.getmtime(spec_path))
+
+
+def load_manifest(path=manifest_file):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=manifest_file):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def init_worker(template, smart):
+    # Fonts, overlays and the detector are loaded here, once, not per label
+    # An exception here would make the pool restart the worker forever, so it's reported per label instead
+    global worker_plan, worker_cache, worker_error
+    try:
+        worker_plan = thumbnail_engine.compile_template(template)
+        worker_cache = thumbnail_engine.open_frame_cache(smart)
+    except Exception as e:
+        worker_error = f"Template {template} failed to load: {e}"
+
+
+def render_one(job):
+    label, video_path, output_path, text, screenshot_time, smart, method = job
+    timings = {}
+    error = None
+    # Saved under a temporary name, so an interrupted render never looks up to date
+    part_path = output_path[:-4] + '.part.png'
+    try:
+        if worker_error:
+            raise RuntimeError(worker_error)
+        started = time.perf_counter()
+        frame = thumbnail_engine.screenshot(video_path, screenshot_time, smart, worker_cache, method)
+        timings['capture'] = time.perf_counter() - started
+        if frame is None:
+            error = 'Failed to capture a frame'
+        else:
+            started = time.perf_counter()
+            image = worker_plan.render([Image.fromarray(frame)], [text])[0]
+            timings['render'] = time.perf_counter() - started
+            started = time.perf_counter()
+            image.save(part_path)
+            os.replace(part_path, output_path)
+            timings['save'] = time.perf_counter() - started
+    except Exception as e:
+        error = str(e)
+    if error and os.path.exists(part_path):
+        os.remove(part_path)
+    return output_path, {
+        'label': label,
+        'video': video_path,
+        'status': 'failed' if error else 'done',
+        'seconds': round(sum(timings.values()), 3),
+        'timings': {step: round(seconds, 3) for step, seconds in timings.items()},
+        'error': error,
+        'finished_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def run_batch(template, start_label, end_label, video_dir, output_dir, workers=workers, text=None,
+              screenshot_time=thumbnail_engine.screenshot_time, manifest_path=manifest_file, force=False, smart=False,
+              method=thumbnail_engine.frame_grab.grab_method):
+    """Render {label}.png for every label whose thumbnail is missing or older than its video or template.
+
+    Each pool worker compiles the template once and then takes whole labels.
+    The manifest records every finished thumbnail with its template, status and
+    timings, keyed by output path so runs with other templates or folders don't
+    overwrite each other. Returns this run's entries.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    spec_path = thumbnail_engine.template_path(template)
+    manifest = load_manifest(manifest_path)
+    videos = find_videos(start_label, end_label, video_dir)
+
+    jobs = []
+    for label, video_path in videos:
+        output_path = os.path.join(output_dir, f"{label}.png")
+        if not force and is_up_to_date(video_path, output_path, spec_path):
+            continue
+        jobs.append((label, video_path, output_path, text, screenshot_time, smart, method))
+    print(f"{len(videos) - len(jobs)} of {len(videos)} thumbnails up to date, rendering {len(jobs)}.")
+    results = {}
+    if not jobs:
+        return results
+
+    with multiprocessing.Pool(min(workers, len(jobs)), initializer=init_worker, initargs=(template, smart)) as pool:
+        for done, (output_path, entry) in enumerate(pool.imap_unordered(render_one, jobs), 1):
+            entry['template'] = template
+            manifest[output_path] = results[output_path] = entry
+            save_manifest(manifest, manifest_path)
+            result = f"failed: {entry['error']}" if entry['error'] else 'done'
+            print(f"[{done}/{len(jobs)}] {entry['label']} {result} in {entry['seconds']:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render thumbnails for many labels in parallel')
+    parser.add_argument('template', help='Template name from the templates folder, or a spec file path')
+    parser.add_argument('--labels', required=True, help='Label range such as 1-150, read as {label}.mp4')
+    parser.add_argument('--video-dir', default='TestVideo', help='Folder holding the labelled videos')
+    parser.add_argument('--output-dir', default='screenshots', help='Folder for the thumbnails')
+    parser.add_argument('--text', help="Text to draw instead of the template's default")
+    parser.add_argument('--time', type=float, default=thumbnail_engine.screenshot_time,
+                        help='Second of the video to take the screenshot from')
+    parser.add_argument('--smart', action='store_true', help='Pick the best scoring keyframe instead of the frame at --time')
+    parser.add_argument('--grab', choices=thumbnail_engine.frame_grab.grab_methods,
+                        default=thumbnail_engine.frame_grab.grab_method, help='How the frame at --time is decoded')
+    parser.add_argument('--workers', type=int, default=workers, help='Number of thumbnails rendered at once')
+    parser.add_argument('--manifest', default=manifest_file, help='Path of the JSON manifest')
+    parser.add_argument('--force', action='store_true', help='Render labels even when their thumbnail is up to date')
+    args = parser.parse_args()
+
+    start_label, end_label = (int(label) for label in args.labels.split('-'))
+    started = time.perf_counter()
+    results = run_batch(args.template, start_label, end_label, args.video_dir, args.output_dir, args.workers,
+                        args.text, args.time, args.manifest, args.force, args.smart, args.grab)
+    failed = [entry for entry in results.values() if entry['status'] == 'failed']
+    print(f"Finished in {time.perf_counter() - started:.1f}s.")
+    if failed:
+        print(f"{len(failed)} thumbnails failed, see {args.manifest}.")
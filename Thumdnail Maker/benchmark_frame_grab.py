@@ -0,0 +1,65 @@
+import os
+import time
+import argparse
+import tempfile
+import frame_grab
+
+
+def codec_name(video_path):
+    try:
+        data = frame_grab.run_ffprobe(['-select_streams', 'v:0', '-show_entries', 'stream=codec_name', video_path])
+        return data['streams'][0]['codec_name']
+    except Exception:
+        return '?'
+
+
+def time_grabs(video_path, times, method, cache, repeats):
+    # Best of the repeats, so a disk cache warming up doesn't count against the first method
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        frames = [frame_grab.grab_frame(video_path, t, method, cache) for t in times]
+        elapsed = (time.perf_counter() - started) / len(times)
+        best = elapsed if best is None else min(best, elapsed)
+    missing = sum(frame is None for frame in frames)
+    return best, missing
+
+
+def benchmark(video_paths, times, methods=frame_grab.grab_methods, repeats=3):
+    """Print milliseconds per grab for each method and video, plus the one-off cost of the keyframe index."""
+    cache_path = os.path.join(tempfile.mkdtemp(), 'frame_index.sqlite')
+    cache = frame_grab.IndexCache(cache_path)
+    print(f"{'video':30s} {'codec':8s} {'keyframes':>9s} {'index ms':>9s} "
+          + ' '.join(f"{method + ' ms':>12s}" for method in methods))
+    for video_path in video_paths:
+        started = time.perf_counter()
+        keyframes = frame_grab.keyframe_index(video_path, cache)
+        index_ms = (time.perf_counter() - started) * 1000
+        results = []
+        for method in methods:
+            seconds, missing = time_grabs(video_path, times, method, cache, repeats)
+            results.append(f"{seconds * 1000:10.1f}{'!' if missing else ' '} ")
+        print(f"{os.path.basename(video_path)[:30]:30s} {codec_name(video_path):8s} {len(keyframes):9d} "
+              f"{index_ms:9.1f} " + ' '.join(results))
+    cache.close()
+    print("Times are per grab with the index cached, ! marks methods that failed to return some frames.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare frame grab methods on sample videos')
+    parser.add_argument('videos', nargs='+', help='Videos to grab from, ideally one per source format')
+    parser.add_argument('--times', default='20', help='Comma separated seconds to grab, such as 20,60,300')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per method, the best one is reported')
+    parser.add_argument('--methods', default=','.join(frame_grab.grab_methods), help='Comma separated methods')
+    args = parser.parse_args()
+
+    if args.repeats < 1:
+        parser.error('--repeats must be at least 1')
+    try:
+        times = [float(t) for t in args.times.split(',') if t.strip()]
+    except ValueError:
+        parser.error(f'--times must be comma separated seconds, got {args.times!r}')
+    if not times:
+        parser.error('--times needs at least one time')
+
+    benchmark(args.videos, times, args.methods.split(','), args.repeats)
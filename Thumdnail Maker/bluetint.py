@@ -2,6 +2,9 @@ import os
 import cv2
 from PIL import Image, ImageEnhance, ImageDraw, ImageFont, ImageFilter, ImageOps, ImageChops
 import numpy as np
+from gradients import add_gradient
+from detector import get_detector
+from asset_cache import load_font
 
 def capture_screenshot(video_path, time=20):
     cap = cv2.VideoCapture(video_path)
@@ -26,72 +29,14 @@ def enhance_image(image):
     image = enhancer.enhance(1.4)  # Increase brightness
     return image
 
-def add_gradient(image, direction='horizontal'):
-    width, height = image.size
-    gradient = Image.new('L', (width, height), color=0xFF)
-
-    for x in range(width):
-        for y in range(height):
-            if direction == 'horizontal':
-                gradient.putpixel((x, y), int(255 * (1 - x / width)))
-            else:
-                gradient.putpixel((x, y), int(255 * (1 - y / height)))
-
-    alpha_gradient = gradient.convert('L')
-    gradient_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    gradient_image.putalpha(alpha_gradient)
-    
-    return Image.alpha_composite(image.convert('RGBA'), gradient_image)
-
 def detect_and_colorize_object(frame, config_path, weights_path):
-    net = cv2.dnn.readNet(weights_path, config_path)
-    layer_names = net.getLayerNames()
-    
-    try:
-        unconnected_out_layers = net.getUnconnectedOutLayers()
-        if isinstance(unconnected_out_layers, np.ndarray):
-            output_layers = [layer_names[i[0] - 1] for i in unconnected_out_layers]
-        else:
-            raise ValueError("Unconnected out layers is not an ndarray")
-    except Exception as e:
-        print(f"Error: {e}")
-        print("Using fallback for output layers.")
-        output_layers = layer_names[-1:]
-
-    height, width, channels = frame.shape
-    blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-    net.setInput(blob)
-    outs = net.forward(output_layers)
-
-    class_ids = []
-    confidences = []
-    boxes = []
-
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            if confidence > 0.5:
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-
-    indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
-
-    if len(indexes) > 0:
-        for i in indexes.flatten():
-            x, y, w, h = boxes[i]
-            roi_color = frame[y:y + h, x:x + w]
-            gray = cv2.cvtColor(roi_color, cv2.COLOR_RGB2GRAY)
-            colored_roi = cv2.merge([gray, gray, gray])
-            frame[y:y + h, x:x + w] = colored_roi
+    # The model is loaded once per run and shared by every thumbnail
+    detector = get_detector(config_path, weights_path)
+    for (x, y, w, h), confidence, class_id in detector.detect([frame])[0]:
+        roi_color = frame[y:y + h, x:x + w]
+        gray = cv2.cvtColor(roi_color, cv2.COLOR_RGB2GRAY)
+        colored_roi = cv2.merge([gray, gray, gray])
+        frame[y:y + h, x:x + w] = colored_roi
 
     return frame
 
@@ -136,7 +81,7 @@ def create_thumbnail_with_effect(image, output_path, config_path, weights_path,
     draw = ImageDraw.Draw(image)
     
     try:
-        font = ImageFont.truetype(font_path, 80)  # Use Berylium font
+        font = load_font(font_path, 80)  # Use Berylium font
     except IOError:
         print(f"Font at {font_path} not found. Using default font.")
         font = ImageFont.load_default()
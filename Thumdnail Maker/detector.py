@@ -0,0 +1,92 @@
+import os
+import cv2
+import numpy as np
+
+# Same settings the thumbnail scripts always used
+input_size = (416, 416)
+scale = 0.00392
+confidence_threshold = 0.5
+nms_threshold = 0.4
+
+# Images sent through the network in one forward pass
+batch_size = 8
+
+
+class ObjectDetector:
+    """YOLO network loaded once, with its output layers and class names, for detecting in many images."""
+
+    def __init__(self, config_path, weights_path, classes_path=None):
+        self.net = cv2.dnn.readNet(weights_path, config_path)
+        # Resolved once here, older OpenCV returns [[i]] from getUnconnectedOutLayers and newer returns [i]
+        layer_names = self.net.getLayerNames()
+        self.output_layers = [layer_names[int(np.ravel(i)[0]) - 1] for i in self.net.getUnconnectedOutLayers()]
+        self.classes = []
+        if classes_path:
+            with open(classes_path, 'r') as f:
+                self.classes = f.read().strip().split('\n')
+
+    def _forward(self, images):
+        blob = cv2.dnn.blobFromImages(images, scale, input_size, (0, 0, 0), True, crop=False)
+        self.net.setInput(blob)
+        outs = self.net.forward(self.output_layers)
+        # Each output layer gives (batch, rows, values), or (rows, values) when the batch was split for us
+        return [[out[index] if out.ndim == 3 else out.reshape(len(images), -1, out.shape[-1])[index]
+                 for out in outs] for index in range(len(images))]
+
+    def _boxes(self, outs, width, height):
+        class_ids = []
+        confidences = []
+        boxes = []
+        for out in outs:
+            scores = out[:, 5:]
+            ids = np.argmax(scores, axis=1)
+            best = scores[np.arange(len(ids)), ids]
+            keep = best > confidence_threshold
+            for detection, class_id, confidence in zip(out[keep], ids[keep], best[keep]):
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                boxes.append([int(center_x - w / 2), int(center_y - h / 2), w, h])
+                confidences.append(float(confidence))
+                class_ids.append(int(class_id))
+
+        indices = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, nms_threshold)
+        indices = list(np.array(indices).flatten()) if len(indices) > 0 else []
+        return [(boxes[i], confidences[i], class_ids[i]) for i in indices]
+
+    def detect(self, images, batch_size=batch_size):
+        """Detections for each RGB image, as lists of (box, confidence, class_id) best first.
+
+        Boxes are [x, y, w, h] in the image's own pixels. Images are run through
+        the network batch_size at a time.
+        """
+        images = [np.asarray(image) for image in images]
+        results = []
+        for start in range(0, len(images), batch_size):
+            batch = images[start:start + batch_size]
+            for image, outs in zip(batch, self._forward(batch)):
+                height, width = image.shape[:2]
+                results.append(self._boxes(outs, width, height))
+        return results
+
+    def best_box(self, image):
+        """The top detection's box in a single image, or None."""
+        detections = self.detect([image])[0]
+        return detections[0][0] if detections else None
+
+    def label(self, class_id):
+        return self.classes[class_id] if class_id < len(self.classes) else str(class_id)
+
+
+# Detectors already loaded in this process, by model files
+_detectors = {}
+
+
+def get_detector(config_path, weights_path, classes_path=None):
+    """Return the detector for these model files, loading it only the first time."""
+    key = tuple(os.path.abspath(path) if path else None for path in (config_path, weights_path, classes_path))
+    if key not in _detectors:
+        print("Loading YOLO model.")
+        _detectors[key] = ObjectDetector(config_path, weights_path, classes_path)
+    return _detectors[key]
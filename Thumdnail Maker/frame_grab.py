@@ -0,0 +1,132 @@
+import os
+import sys
+import shutil
+import bisect
+import subprocess
+import cv2
+import numpy as np
+
+# Shared helpers used by the video tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from video_cache import VideoCache, run_ffprobe
+
+ffmpeg_path = shutil.which('ffmpeg') or 'ffmpeg'
+
+# Keyframe indexes and stream info, reused while a video's size and modification time are unchanged
+index_cache_file = 'frame_index.sqlite'
+
+# OpenCV seeks this many frames before the requested one and decodes forward from the keyframe it
+# lands on. Asking for a keyframe itself lands on the previous GOP, asking for keyframe + lead
+# starts decoding at the keyframe
+opencv_seek_lead = 16
+
+# How frames are grabbed unless the caller picks:
+#   'keyframe'  snap to a keyframe near time and seek just past it with OpenCV, decoding at most the lead
+#   'ffmpeg'    snap the same way, then decode with ffmpeg -ss before -i, reading raw RGB from a pipe
+#   'frames'    the old way, CAP_PROP_POS_FRAMES to the exact frame, decoding from the previous keyframe
+grab_method = 'keyframe'
+grab_methods = ('keyframe', 'ffmpeg', 'frames')
+
+
+class IndexCache(VideoCache):
+    """Keyframe indexes and stream sizes, keyed by video path, size and modification time."""
+
+    table = 'videos'
+
+    def __init__(self, path=index_cache_file):
+        super().__init__(path)
+
+
+def keyframe_index(video_path, cache=None):
+    """Keyframe times of the first video stream, read from packet flags without decoding.
+
+    Empty when ffprobe isn't available or can't read the file, callers then
+    seek to the exact time instead.
+    """
+    def compute():
+        try:
+            packets = run_ffprobe(['-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags',
+                                   video_path]).get('packets', [])
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            return []
+        times = []
+        for packet in packets:
+            if 'K' in packet.get('flags', '') and packet.get('pts_time') not in (None, 'N/A'):
+                times.append(float(packet['pts_time']))
+        return sorted(set(times))
+    return cache.get(video_path, 'keyframes', compute) if cache else compute()
+
+
+def stream_size(video_path, cache=None):
+    """(width, height) of the first video stream, needed to read raw frames from ffmpeg."""
+    def compute():
+        stream = run_ffprobe(['-select_streams', 'v:0', '-show_entries', 'stream=width,height',
+                              video_path])['streams'][0]
+        return [stream['width'], stream['height']]
+    return tuple(cache.get(video_path, 'size', compute) if cache else compute())
+
+
+def nearest_keyframe(keyframes, time):
+    if not keyframes:
+        return time
+    i = bisect.bisect_left(keyframes, time)
+    return min(keyframes[max(i - 1, 0):i + 1], key=lambda keyframe: abs(keyframe - time))
+
+
+def grab_exact(video_path, time):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, int(fps * time))
+    success, frame = cap.read()
+    cap.release()
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if success else None
+
+
+def keyframe_seek_time(cap, keyframe):
+    """Time to seek an open capture to so OpenCV starts decoding at keyframe."""
+    return keyframe + opencv_seek_lead / (cap.get(cv2.CAP_PROP_FPS) or 25.0)
+
+
+def read_at(cap, time):
+    cap.set(cv2.CAP_PROP_POS_MSEC, time * 1000)
+    success, frame = cap.read()
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if success else None
+
+
+def grab_keyframe(video_path, keyframes, time):
+    cap = cv2.VideoCapture(video_path)
+    # Snapped so the frame returned, lead frames after the keyframe, is the one closest to time
+    lead = keyframe_seek_time(cap, 0)
+    frame = read_at(cap, nearest_keyframe(keyframes, time - lead) + lead)
+    cap.release()
+    return frame
+
+
+def grab_ffmpeg(video_path, time, cache=None):
+    # -ss before -i seeks in the demuxer, so only the frames from the keyframe at or before time are decoded
+    width, height = stream_size(video_path, cache)
+    cmd = [ffmpeg_path, '-v', 'error', '-ss', f'{time:.6f}', '-i', video_path, '-map', '0:v:0', '-frames:v', '1',
+           '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0 or len(result.stdout) != width * height * 3:
+        return None
+    return np.frombuffer(result.stdout, np.uint8).reshape(height, width, 3)
+
+
+def grab_frame(video_path, time, method=grab_method, cache=None):
+    """RGB frame of video_path near time, or None.
+
+    'keyframe' and 'ffmpeg' return a frame at or just after a keyframe near time,
+    so the cost of a grab doesn't grow with the GOP length. 'frames' returns
+    the exact frame. Without a keyframe index every method falls back to 'frames'.
+    """
+    keyframes = keyframe_index(video_path, cache) if method != 'frames' else []
+    if not keyframes:
+        return grab_exact(video_path, time)
+    if method == 'ffmpeg':
+        try:
+            return grab_ffmpeg(video_path, nearest_keyframe(keyframes, time), cache)
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError, IndexError):
+            # No ffmpeg here, OpenCV can still seek by keyframe
+            pass
+    return grab_keyframe(video_path, keyframes, time)
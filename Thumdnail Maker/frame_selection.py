@@ -0,0 +1,166 @@
+import os
+import argparse
+import cv2
+import numpy as np
+import frame_grab
+
+# Candidate keyframes decoded and scored per video
+samples = 12
+
+# Share of the video skipped at the start and the end, where title cards and end screens are
+skip_start = 0.1
+skip_end = 0.1
+
+# Frames are scored at this width, enough for the measures and much cheaper than full size
+score_width = 320
+
+# Pixels darker than black_level count as black, frames with less than min_non_black lit are never picked
+black_level = 24
+min_non_black = 0.4
+
+# Laplacian variance counted as fully sharp
+sharpness_target = 400.0
+
+# How much each measure counts towards a frame's score
+weights = {'sharpness': 0.35, 'exposure': 0.25, 'non_black': 0.15, 'subjects': 0.25}
+
+# Per video measurements, reused while the video's size and modification time are unchanged
+score_cache_file = 'frame_scores.sqlite'
+
+face_cascade_path = os.path.join(getattr(getattr(cv2, 'data', None), 'haarcascades', ''),
+                                 'haarcascade_frontalface_default.xml')
+
+
+class ScoreCache(frame_grab.IndexCache):
+    """Measured candidate frames and keyframe indexes, keyed by video path, size and modification time."""
+
+    table = 'scores'
+
+    def __init__(self, path=score_cache_file):
+        super().__init__(path)
+
+
+def video_duration(cap):
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps else 0.0
+
+
+def candidate_times(video_path, cap, samples=samples, cache=None):
+    """Up to samples times spread over the middle of the video, snapped to keyframes when they are known.
+
+    Seeking to a keyframe only decodes that one frame, anywhere else decodes
+    the whole GOP up to it.
+    """
+    duration = video_duration(cap)
+    start, end = duration * skip_start, duration * (1 - skip_end)
+    keyframes = [t for t in frame_grab.keyframe_index(video_path, cache) if start <= t <= end]
+    if keyframes:
+        picks = np.linspace(0, len(keyframes) - 1, min(samples, len(keyframes))).round().astype(int)
+        return [keyframes[i] for i in sorted(set(picks))]
+    if duration <= 0:
+        return []
+    return list(np.linspace(start, end, samples))
+
+
+def grab_frame(cap, time):
+    # Candidates are keyframes, seeking just past them starts the decode at the keyframe itself
+    return frame_grab.read_at(cap, frame_grab.keyframe_seek_time(cap, time))
+
+
+_face_cascade = None
+
+
+def detect_faces(gray):
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(face_cascade_path) if os.path.exists(face_cascade_path) else False
+    if not _face_cascade:
+        return 0
+    return len(_face_cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=(24, 24)))
+
+
+def measure(frame):
+    """Raw measurements of an RGB frame, scored later so the weights can change without decoding again."""
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (score_width, max(1, round(height * score_width / width))), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    return {
+        'sharpness': float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        'brightness': float(gray.mean()),
+        'clipped': float(np.mean((gray < 16) | (gray > 239))),
+        'non_black': float(np.mean(gray > black_level)),
+        'faces': detect_faces(gray),
+    }
+
+
+def score(metrics):
+    """Combine a frame's measurements into one number, 0 for frames that are mostly black."""
+    if metrics['non_black'] < min_non_black:
+        return 0.0
+    parts = {
+        'sharpness': min(metrics['sharpness'] / sharpness_target, 1.0),
+        # Best at mid grey, and worse the more of the frame is crushed or blown out
+        'exposure': max(0.0, 1 - abs(metrics['brightness'] / 255 - 0.5) * 2 - metrics['clipped']),
+        'non_black': metrics['non_black'],
+        'subjects': max(min(metrics['faces'], 1), metrics.get('objects') or 0.0),
+    }
+    return sum(weights[name] * value for name, value in parts.items())
+
+
+def score_video(video_path, samples=samples, detector=None, cache=None):
+    """Measure and score candidate keyframes, best first, as dicts with 'time', the measurements and 'score'.
+
+    With a detector, each candidate also gets the confidence of its best
+    object. With a cache, the decode and measurements are skipped for videos
+    already scored.
+    """
+    def compute():
+        cap = cv2.VideoCapture(video_path)
+        candidates = []
+        frames = []
+        for time in candidate_times(video_path, cap, samples, cache):
+            frame = grab_frame(cap, time)
+            if frame is not None:
+                candidates.append(dict(measure(frame), time=time))
+                frames.append(frame)
+        cap.release()
+        if detector is not None and frames:
+            for candidate, found in zip(candidates, detector.detect(frames)):
+                candidate['objects'] = found[0][1] if found else 0.0
+        return candidates
+
+    kind = f"candidates {samples}{' objects' if detector is not None else ''}"
+    candidates = cache.get(video_path, kind, compute) if cache else compute()
+    for candidate in candidates:
+        candidate['score'] = score(candidate)
+    return sorted(candidates, key=lambda candidate: candidate['score'], reverse=True)
+
+
+def select_frame(video_path, samples=samples, detector=None, cache=None, fallback_time=20):
+    """Return (time, RGB frame) of the best scoring candidate, or the frame at fallback_time if none scored."""
+    candidates = [candidate for candidate in score_video(video_path, samples, detector, cache) if candidate['score'] > 0]
+    time = candidates[0]['time'] if candidates else fallback_time
+    cap = cv2.VideoCapture(video_path)
+    frame = grab_frame(cap, time)
+    cap.release()
+    return time, frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Score candidate thumbnail frames of a video')
+    parser.add_argument('video', help='Path to the video')
+    parser.add_argument('--samples', type=int, default=samples, help='Number of keyframes scored')
+    parser.add_argument('--cache', default=score_cache_file, help='Path of the score cache')
+    parser.add_argument('--save', help='Save the best frame to this image path')
+    args = parser.parse_args()
+
+    cache = ScoreCache(args.cache)
+    for candidate in score_video(args.video, args.samples, cache=cache):
+        print(f"{candidate['time']:8.2f}s  score {candidate['score']:.3f}  sharpness {candidate['sharpness']:7.1f}  "
+              f"brightness {candidate['brightness']:5.1f}  lit {candidate['non_black']:.2f}  faces {candidate['faces']}")
+    if args.save:
+        time, frame = select_frame(args.video, args.samples, cache=cache)
+        if frame is not None:
+            cv2.imwrite(args.save, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            print(f"Best frame at {time:.2f}s saved to {args.save}")
+    cache.close()
@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+import yaml
+from PIL import Image, ImageDraw, ImageEnhance, ImageFont, ImageOps
+
+import detector
+import asset_cache
+import frame_grab
+import frame_selection
+from gradients import add_gradient
+from bluetint import add_rounded_border
+
+# Relative font, asset and model paths in a template are read from this folder
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+# One spec per thumbnail style, looked up by name
+template_dir = os.path.join(base_dir, 'templates')
+
+# Second of the video the screenshot is taken from
+screenshot_time = 20
+
+# Models used by the object steps unless the step names its own
+default_model = {'config': 'yolov3.cfg', 'weights': 'yolov3.weights', 'classes': 'coco.names'}
+
+
+def resolve(path):
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def capture_screenshot(video_path, time=screenshot_time, method=frame_grab.grab_method, cache=None):
+    return frame_grab.grab_frame(video_path, time, method, cache)
+
+
+def selection_detector():
+    # Frames are scored with the model the object steps use, loaded once for both, when it is there
+    if not os.path.exists(resolve(default_model['weights'])):
+        return None
+    return detector.get_detector(resolve(default_model['config']), resolve(default_model['weights']),
+                                 resolve(default_model['classes']))
+
+
+def screenshot(video_path, time=screenshot_time, smart=False, cache=None, method=frame_grab.grab_method):
+    """The frame to render: the best scoring keyframe when smart, otherwise the frame near time."""
+    if smart:
+        return frame_selection.select_frame(video_path, detector=selection_detector(), cache=cache,
+                                            fallback_time=time)[1]
+    return capture_screenshot(video_path, time, method, cache)
+
+
+def open_frame_cache(smart):
+    # Both keep keyframe indexes, the score cache also keeps the measured candidates
+    return frame_selection.ScoreCache() if smart else frame_grab.IndexCache()
+
+
+def load_font(path, size):
+    try:
+        return asset_cache.load_font(resolve(path), size)
+    except IOError:
+        print(f"Font at {path} not found. Using default font.")
+        return ImageFont.load_default()
+
+
+def color(value):
+    # Colors can be names or hex strings PIL understands, or [r, g, b] lists
+    return tuple(value) if isinstance(value, list) else value
+
+
+# Each step compiles to a function taking the batch of images and their texts and
+# returning the new images. Fonts, overlays and models are loaded at compile time.
+
+def _each(function):
+    return lambda images, texts: [function(image) for image in images]
+
+
+def _detector(step):
+    model = dict(default_model, **step.get('model', {}))
+    return detector.get_detector(resolve(model['config']), resolve(model['weights']),
+                                 resolve(model['classes']) if model.get('classes') else None)
+
+
+def compile_colorize_object(step):
+    """Keep the most confident object in color and turn the rest of the image gray."""
+    object_detector = _detector(step)
+
+    def colorize(images, texts):
+        detections = object_detector.detect([np.asarray(image) for image in images])
+        results = []
+        for image, found in zip(images, detections):
+            if not found:
+                results.append(image)
+                continue
+            x, y, w, h = found[0][0]
+            mask = Image.new('L', image.size, 0)
+            ImageDraw.Draw(mask).rectangle([x, y, x + w, y + h], fill=255)
+            results.append(Image.composite(image, ImageOps.grayscale(image).convert('RGB'), mask))
+        return results
+    return colorize
+
+
+def compile_gray_objects(step):
+    """Turn every detected object gray, leaving the rest of the image alone."""
+    object_detector = _detector(step)
+
+    def gray_objects(images, texts):
+        frames = [np.array(image) for image in images]
+        for frame, found in zip(frames, object_detector.detect(frames)):
+            for (x, y, w, h), confidence, class_id in found:
+                gray = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_RGB2GRAY)
+                frame[y:y + h, x:x + w] = cv2.merge([gray, gray, gray])
+        return [Image.fromarray(frame) for frame in frames]
+    return gray_objects
+
+
+def compile_grayscale(step):
+    return _each(lambda image: image.convert('L'))
+
+
+def compile_enhance(step):
+    contrast = step.get('contrast', 1.0)
+    sharpness = step.get('sharpness', 1.0)
+    brightness = step.get('brightness', 1.0)
+
+    def enhance(image):
+        image = ImageEnhance.Contrast(image).enhance(contrast)
+        image = ImageEnhance.Sharpness(image).enhance(sharpness)
+        return ImageEnhance.Brightness(image).enhance(brightness)
+    return _each(enhance)
+
+
+def compile_tint(step):
+    tint_color = color(step.get('color', [0, 0, 255]))
+    alpha = step.get('alpha', 0.3)
+    layers = {}
+
+    def tint(image):
+        image = image.convert('RGB')
+        if image.size not in layers:
+            layers[image.size] = Image.new('RGB', image.size, tint_color)
+        return Image.blend(image, layers[image.size], alpha=alpha)
+    return _each(tint)
+
+
+def compile_crop(step):
+    """Center crop to the target aspect ratio, then resize, like the Scripts' crop_and_resize_to_aspect_ratio."""
+    target_width, target_height = step.get('size', [1280, 720])
+    aspect_ratio = target_width / target_height
+
+    def crop(image):
+        img_width, img_height = image.size
+        if img_width / img_height > aspect_ratio:
+            new_width, new_height = int(img_height * aspect_ratio), img_height
+        else:
+            new_width, new_height = img_width, int(img_width / aspect_ratio)
+        left = (img_width - new_width) / 2
+        top = (img_height - new_height) / 2
+        image = image.crop((left, top, left + new_width, top + new_height))
+        return image.resize((target_width, target_height), Image.LANCZOS)
+    return _each(crop)
+
+
+def compile_fit(step):
+    size = tuple(step.get('size', [1280, 720]))
+    return _each(lambda image: ImageOps.fit(image, size, method=Image.Resampling.LANCZOS))
+
+
+def compile_gradient(step):
+    direction = step.get('direction', 'horizontal')
+    return _each(lambda image: add_gradient(image, direction))
+
+
+def compile_border(step):
+    border_color = color(step.get('color', [255, 255, 255]))
+    thickness = step.get('thickness', 20)
+    radius = step.get('radius', 50)
+    return _each(lambda image: add_rounded_border(image, border_color, thickness, radius))
+
+
+def compile_text(step):
+    """Centered text near the bottom. The label's text, or the step's default."""
+    font = load_font(step.get('font', 'Fonts/Bangers-Regular.ttf'), step.get('size', 120))
+    default = step.get('default', 'Rediscover The Past')
+    fill = color(step.get('color', 'white'))
+    stroke_fill = color(step.get('stroke_color', 'black'))
+    stroke_width = step.get('stroke_width', 0)
+    bottom = step.get('bottom', 50)
+    # 'box' centers the drawn glyphs, 'origin' also counts the font's offset, as the older scripts did
+    measure = step.get('measure', 'box')
+
+    def draw_text(images, texts):
+        for image, text in zip(images, texts):
+            text = text or default
+            draw = ImageDraw.Draw(image)
+            left, top, right, lower = draw.textbbox((0, 0), text, font=font)
+            width, height = (right, lower) if measure == 'origin' else (right - left, lower - top)
+            position = ((image.width - width) // 2, image.height - height - bottom)
+            draw.text(position, text, fill=fill, font=font, stroke_width=stroke_width, stroke_fill=stroke_fill)
+        return images
+    return draw_text
+
+
+def compile_overlay(step):
+    """Paste an image, such as the subscribe button, into a corner."""
+    path = step['path']
+    anchor = step.get('anchor', 'top-right')
+    margin = step.get('margin', 20)
+    try:
+        overlay = asset_cache.load_overlay(resolve(path), step.get('size'))
+    except Exception as e:
+        print(f"Failed to load overlay {path}, it will be left out: {e}")
+        return lambda images, texts: images
+
+    def paste(image):
+        vertical, horizontal = anchor.split('-')
+        x = margin if horizontal == 'left' else image.width - overlay.width - margin
+        y = margin if vertical == 'top' else image.height - overlay.height - margin
+        image.paste(overlay, (x, y), overlay)
+        return image
+    return _each(paste)
+
+
+operations = {
+    'colorize_object': compile_colorize_object,
+    'gray_objects': compile_gray_objects,
+    'grayscale': compile_grayscale,
+    'enhance': compile_enhance,
+    'tint': compile_tint,
+    'crop': compile_crop,
+    'fit': compile_fit,
+    'gradient': compile_gradient,
+    'border': compile_border,
+    'text': compile_text,
+    'overlay': compile_overlay,
+}
+
+
+class RenderPlan:
+    """A template compiled once, rendering any number of screenshots with the same loaded assets."""
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = steps
+
+    def render(self, images, texts=None):
+        """Render a batch of PIL images, so object steps run the detector once for the whole batch."""
+        texts = texts or [None] * len(images)
+        images = [image.convert('RGB') for image in images]
+        for step in self.steps:
+            images = step(images, texts)
+        return images
+
+
+def template_path(name):
+    """Path of a template given as a .yaml or .json path, or by name from the templates folder."""
+    if os.path.exists(name):
+        return name
+    candidates = [os.path.join(template_dir, name + extension) for extension in ('.yaml', '.yml', '.json')]
+    path = next((candidate for candidate in candidates if os.path.exists(candidate)), None)
+    if path is None:
+        raise FileNotFoundError(f"No template named {name} in {template_dir}")
+    return path
+
+
+def load_template(name):
+    path = template_path(name)
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f) if path.endswith('.json') else yaml.safe_load(f)
+    spec.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return spec
+
+
+def compile_template(spec):
+    if isinstance(spec, str):
+        spec = load_template(spec)
+    steps = []
+    for step in spec['steps']:
+        if step['op'] not in operations:
+            raise ValueError(f"Unknown step '{step['op']}' in template {spec['name']}")
+        steps.append(operations[step['op']](step))
+    return RenderPlan(spec['name'], steps)
+
+
+def list_templates():
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(template_dir)
+                  if name.endswith(('.yaml', '.yml', '.json')))
+
+
+def render_labels(plan, start_label, end_label, video_dir, output_dir, text=None, time=screenshot_time,
+                  batch_size=detector.batch_size, smart=False, method=frame_grab.grab_method):
+    """Render {label}.png into output_dir for every {label}.mp4 in video_dir, batch_size screenshots at a time.
+
+    With smart, each video's frame is picked by frame_selection instead of taken at time.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache = open_frame_cache(smart)
+    pending = []
+    rendered = 0
+
+    def flush():
+        nonlocal rendered
+        images = plan.render([image for label, image in pending], [text] * len(pending))
+        for (label, _), image in zip(pending, images):
+            output_path = os.path.join(output_dir, f"{label}.png")
+            image.save(output_path)
+            print(f"Thumbnail saved at: {output_path}")
+        rendered += len(pending)
+        pending.clear()
+
+    for label in range(start_label, end_label + 1):
+        video_path = os.path.join(video_dir, f"{label}.mp4")
+        if not os.path.exists(video_path):
+            print(f"Video {video_path} not found")
+            continue
+        frame = screenshot(video_path, time, smart, cache, method)
+        if frame is None:
+            print(f"Failed to capture frame from {video_path}")
+            continue
+        pending.append((label, Image.fromarray(frame)))
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+    cache.close()
+    return rendered
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render thumbnails for a range of labels from a template')
+    parser.add_argument('template', nargs='?', help='Template name from the templates folder, or a spec file path')
+    parser.add_argument('--labels', default='4632-4635', help='Label range such as 1-150, read as {label}.mp4')
+    parser.add_argument('--video-dir', default='TestVideo', help='Folder holding the labelled videos')
+    parser.add_argument('--output-dir', default='screenshots', help='Folder for the thumbnails')
+    parser.add_argument('--text', help="Text to draw instead of the template's default")
+    parser.add_argument('--time', type=float, default=screenshot_time, help='Second of the video to take the screenshot from')
+    parser.add_argument('--batch-size', type=int, default=detector.batch_size, help='Screenshots rendered together')
+    parser.add_argument('--smart', action='store_true', help='Pick the best scoring keyframe instead of the frame at --time')
+    parser.add_argument('--grab', choices=frame_grab.grab_methods, default=frame_grab.grab_method,
+                        help='How the frame at --time is decoded, see frame_grab.py')
+    parser.add_argument('--list', action='store_true', help='List the available templates')
+    args = parser.parse_args()
+
+    if args.list or not args.template:
+        print('\n'.join(list_templates()))
+    else:
+        started = time.perf_counter()
+        plan = compile_template(args.template)
+        compiled = time.perf_counter()
+        start_label, end_label = (int(label) for label in args.labels.split('-'))
+        count = render_labels(plan, start_label, end_label, args.video_dir, args.output_dir, args.text, args.time,
+                              args.batch_size, args.smart, args.grab)
+        print(f"Compiled {plan.name} in {compiled - started:.2f}s, rendered {count} thumbnails in "
+              f"{time.perf_counter() - compiled:.2f}s")
@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Name of the index file, kept inside the download directory next to the videos
+index_file = 'download_index.sqlite'
+
+
+def video_id_from_url(url):
+    """Return the YouTube video id for url, or the url itself if it has none."""
+    match = re.search(r'(?:[?&]v=|youtu\.be/|/shorts/)([\w-]{11})', url)
+    return match.group(1) if match else url
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class DownloadIndex:
+    """Persistent record of which source videos were downloaded and under which label.
+
+    Keyed by video id (or URL for non-YouTube sources) and storing label, size,
+    checksum and status, so reruns skip finished videos and the next label comes
+    from the index instead of a scan of the download directory.
+    """
+
+    checksum = staticmethod(file_checksum)
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Downloads finish on worker threads, so the connection is shared behind a lock
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS downloads ('
+            'video_id TEXT PRIMARY KEY, url TEXT, label INTEGER, size INTEGER, '
+            'checksum TEXT, status TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS downloads_label ON downloads (label)')
+        self.db.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM downloads').fetchone()[0]
+
+    def get(self, url):
+        with self.lock:
+            row = self.db.execute(
+                'SELECT video_id, url, label, size, checksum, status FROM downloads WHERE video_id = ?',
+                (video_id_from_url(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('video_id', 'url', 'label', 'size', 'checksum', 'status'), row))
+
+    def is_done(self, url):
+        entry = self.get(url)
+        return entry is not None and entry['status'] == 'done'
+
+    def filter_new(self, urls):
+        """Return the urls that haven't been downloaded yet, in their original order."""
+        with self.lock:
+            done = {row[0] for row in self.db.execute("SELECT video_id FROM downloads WHERE status = 'done'")}
+        return [url for url in urls if video_id_from_url(url) not in done]
+
+    def next_label(self, fallback):
+        """Return the label after the highest one in the index.
+
+        fallback is called (e.g. a directory scan) only while the index is empty.
+        """
+        with self.lock:
+            max_label = self.db.execute('SELECT MAX(label) FROM downloads').fetchone()[0]
+        return max_label + 1 if max_label is not None else fallback()
+
+    def mark(self, url, status, label=None, path=None, checksum=None):
+        size = None
+        if path and os.path.exists(path):
+            size = os.path.getsize(path)
+            if checksum is None:
+                checksum = file_checksum(path)
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO downloads (video_id, url, label, size, checksum, status, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (video_id_from_url(url), url, label, size, checksum, status, time.time()),
+            )
+            self.db.commit()
+
+    def mark_done(self, url, label, path, checksum=None):
+        self.mark(url, 'done', label=label, path=path, checksum=checksum)
+
+    def mark_failed(self, url):
+        # Don't let a failed retry overwrite an earlier successful download
+        if not self.is_done(url):
+            self.mark(url, 'failed')
+
+    def seed_from_records(self, records, download_dir):
+        """Import an existing video_details.json so videos fetched before the index existed are skipped."""
+        for record in records:
+            url = record.get('Video URL')
+            if not url or self.is_done(url):
+                continue
+            path = os.path.join(download_dir, f"{record['Label']}.mp4")
+            if os.path.exists(path):
+                # Size only, hashing a whole back catalogue on first run would take too long
+                with self.lock:
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO downloads (video_id, url, label, size, checksum, status, updated_at) '
+                        "VALUES (?, ?, ?, ?, NULL, 'done', ?)",
+                        (video_id_from_url(url), url, record['Label'], os.path.getsize(path), time.time()),
+                    )
+        with self.lock:
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Records are fsynced after this many appends or this many seconds, whichever comes first
+fsync_every = 20
+fsync_interval = 10.0
+
+
+def ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+class RecordSink:
+    """Append-only JSONL writer for video detail records.
+
+    Each record is written and flushed as soon as it arrives, and fsynced
+    periodically, so a crash loses at most the last few records instead of the
+    whole run. Use compact() to turn the log into the usual video_details.json.
+    """
+
+    def __init__(self, path, fsync_every=fsync_every, fsync_interval=fsync_interval):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8')
+        # Start on a fresh line if the last run died halfway through writing one
+        if not ends_with_newline(path):
+            self.file.write('\n')
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def sync(self):
+        with self.lock:
+            self.file.flush()
+            self._sync()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+                self._sync()
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_records(path):
+    """Read every complete record from a JSONL file, skipping a half-written last line."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {path}")
+    return records
+
+
+def compact(jsonl_path, json_path, key='Label', merge=False):
+    """Write the records in jsonl_path to json_path in the pretty-printed list format.
+
+    When a key appears more than once the last record wins, keeping the position
+    of the first one. With merge, the records already in json_path are kept and
+    the new ones are merged into them by key, for logs that only hold one run.
+    The JSON file is replaced atomically.
+    """
+    by_key = {}
+    if merge and os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            for record in json.load(f):
+                by_key[record.get(key)] = record
+    for record in read_records(jsonl_path):
+        by_key[record.get(key)] = record
+    records = list(by_key.values())
+
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, json_path)
+    return records
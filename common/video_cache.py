@@ -0,0 +1,59 @@
+import os
+import json
+import shutil
+import sqlite3
+import threading
+import subprocess
+
+ffprobe_path = shutil.which('ffprobe') or 'ffprobe'
+
+
+class VideoCache:
+    """Per video data such as probe results, keyed by path, kind, size and modification time.
+
+    Entries are reused while the file's size and modification time are
+    unchanged. Subclasses pick their own table.
+    """
+
+    table = 'videos'
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by worker threads behind a lock, and opened by several processes in batch
+        # renders, so it waits for the file lock instead of failing
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'path TEXT, kind TEXT, size INTEGER, mtime REAL, data TEXT, PRIMARY KEY (path, kind))'
+        )
+        self.db.commit()
+
+    def get(self, path, kind, compute):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.lock:
+            row = self.db.execute(
+                f'SELECT size, mtime, data FROM {self.table} WHERE path = ? AND kind = ?', (path, kind)
+            ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return json.loads(row[2])
+        data = compute()
+        with self.lock:
+            self.db.execute(
+                f'INSERT OR REPLACE INTO {self.table} (path, kind, size, mtime, data) VALUES (?, ?, ?, ?, ?)',
+                (path, kind, stat.st_size, stat.st_mtime, json.dumps(data)),
+            )
+            self.db.commit()
+        return data
+
+    def close(self):
+        self.db.close()
+
+
+def run_ffprobe(args, ffprobe_path=ffprobe_path):
+    """Run ffprobe with JSON output and return the parsed result."""
+    cmd = [ffprobe_path, '-v', 'error', '-print_format', 'json'] + args
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    return json.loads(result.stdout)
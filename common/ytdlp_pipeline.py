@@ -0,0 +1,169 @@
+import os
+import logging
+import threading
+import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Number of URLs whose info is extracted at the same time
+extract_workers = 4
+
+# Number of videos downloaded at the same time
+download_workers = 2
+
+extract_retries = 3
+
+# Extracted videos allowed per download worker, counting the one downloading. Format URLs
+# in an info dict are signed and expire after a few hours, so extraction must not run far
+# ahead of the downloads on a long playlist
+extracted_per_download = 2
+
+video_format = 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best[ext=mp4]/best'
+
+
+def extract_info(url, retries=extract_retries):
+    """Extract the info dict for url once, without resolving formats.
+
+    The unprocessed result is handed straight to the downloader, so yt-dlp never
+    has to extract the same page a second time.
+    """
+    for attempt in range(retries):
+        try:
+            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+                return ydl.extract_info(url, download=False, process=False)
+        except Exception as e:
+            logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+    logger.error(f"Failed to fetch details for {url} after {retries} attempts")
+    return None
+
+
+def download_info(info, pending_dir, ffmpeg_location):
+    """Download an already extracted video into pending_dir and return the file path."""
+    ydl_opts = {
+        'outtmpl': os.path.join(pending_dir, '%(id)s.%(ext)s'),
+        'format': video_format,
+        'ffmpeg_location': ffmpeg_location,
+        'postprocessors': [{'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4'}],
+        'retries': 5,
+        'fragment_retries': 5,
+        'continuedl': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        result = ydl.process_ie_result(dict(info), download=True)
+        downloads = result.get('requested_downloads') or [{}]
+        filepath = downloads[-1].get('filepath') or result.get('filepath')
+        if not filepath or not os.path.exists(filepath):
+            filepath = os.path.splitext(ydl.prepare_filename(result))[0] + '.mp4'
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Downloaded file for {info.get('id')} not found")
+    return filepath
+
+
+class LabelCommitter:
+    """Hands out labels in playlist order, and only to videos that downloaded.
+
+    Finished downloads wait in the pending directory until every earlier entry has
+    either succeeded or failed, so labels are gapless and don't depend on which
+    thread finishes first.
+    """
+
+    def __init__(self, next_label, download_dir, on_record=None, index=None):
+        self.next_label = next_label
+        self.download_dir = download_dir
+        self.on_record = on_record
+        self.index = index
+        self.results = {}
+        self.position = 0
+        self.records = []
+        self.lock = threading.Lock()
+
+    def resolve(self, position, result):
+        with self.lock:
+            self.results[position] = result
+            while self.position in self.results:
+                result = self.results.pop(self.position)
+                self.position += 1
+                if result is not None:
+                    self._commit(*result)
+
+    def _commit(self, url, info, filepath, checksum=None):
+        label = self.next_label
+        final_path = os.path.join(self.download_dir, f'{label}.mp4')
+        # The index can lag the directory (videos from before it, manual copies), so a
+        # label whose file already exists is skipped rather than overwritten
+        while os.path.exists(final_path):
+            logger.warning(f"{final_path} already exists, skipping label {label}")
+            label += 1
+            final_path = os.path.join(self.download_dir, f'{label}.mp4')
+        os.replace(filepath, final_path)
+        self.next_label = label + 1
+        if self.index is not None:
+            self.index.mark_done(url, label, final_path, checksum)
+        record = {
+            'Label': label,
+            'Video URL': url,
+            'Title': info.get('title', 'No Title'),
+            'Description': info.get('description', 'No Description'),
+            'Tags': info.get('tags', [])
+        }
+        logger.info(f"Downloaded video {label}: {record['Title']}")
+        if self.on_record:
+            self.on_record(record)
+        else:
+            self.records.append(record)
+
+
+def run_pipeline(video_urls, download_dir, next_label, ffmpeg_location,
+                 extract_workers=extract_workers, download_workers=download_workers, on_record=None, index=None):
+    """Extract and download every URL, returning the records in label order.
+
+    Extraction and download run on separate pools, so slow downloads don't stall
+    metadata extraction for the rest of the playlist. When a DownloadIndex is
+    given, every success and failure is recorded in it. With an on_record callback
+    each record is passed on as it is committed instead of being collected, and
+    the returned list is empty.
+    """
+    pending_dir = os.path.join(download_dir, 'pending')
+    os.makedirs(pending_dir, exist_ok=True)
+    committer = LabelCommitter(next_label, download_dir, on_record, index)
+    # Taken before a URL is extracted and given back once its download has finished
+    ahead = threading.BoundedSemaphore(download_workers * extracted_per_download)
+
+    # The extract pool is shut down first, so every download is queued before the
+    # download pool is waited on
+    with ThreadPoolExecutor(max_workers=download_workers) as download_pool, \
+            ThreadPoolExecutor(max_workers=extract_workers) as extract_pool:
+
+        def download_stage(position, url, info):
+            try:
+                filepath = download_info(info, pending_dir, ffmpeg_location)
+                # Hash on the worker thread rather than while holding the commit lock
+                checksum = index.checksum(filepath) if index is not None else None
+            except Exception as e:
+                logger.error(f"Error downloading video for {url}: {e}")
+                filepath = None
+            finally:
+                ahead.release()
+            if filepath is None:
+                if index is not None:
+                    index.mark_failed(url)
+                committer.resolve(position, None)
+            else:
+                committer.resolve(position, (url, info, filepath, checksum))
+
+        def extract_stage(position, url):
+            ahead.acquire()
+            info = extract_info(url)
+            if info is None:
+                ahead.release()
+                if index is not None:
+                    index.mark_failed(url)
+                committer.resolve(position, None)
+            else:
+                download_pool.submit(download_stage, position, url, info)
+
+        for position, url in enumerate(video_urls):
+            extract_pool.submit(extract_stage, position, url)
+
+    return committer.records
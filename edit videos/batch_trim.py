@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Shared helpers used by the video tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from video_cache import VideoCache, run_ffprobe
+
+ffmpeg_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ffmpeg', 'bin')
+ffmpeg_path = os.path.join(ffmpeg_dir, 'ffmpeg.exe')
+ffprobe_path = os.path.join(ffmpeg_dir, 'ffprobe.exe')
+
+# Fall back to the ffmpeg on PATH when the bundled Windows build isn't there
+if not os.path.isfile(ffmpeg_path):
+    ffmpeg_path = shutil.which('ffmpeg') or ffmpeg_path
+if not os.path.isfile(ffprobe_path):
+    ffprobe_path = shutil.which('ffprobe') or ffprobe_path
+
+# Number of ffmpeg processes running at the same time
+max_workers = os.cpu_count() or 4
+
+# Probe results, reused while a file's size and modification time are unchanged
+probe_cache_file = 'probe_cache.sqlite'
+
+# Seconds scanned for keyframes after the start and before the end in frame accurate mode
+keyframe_window = 20.0
+
+# Encoders used for the re-encoded head and tail, matching the source codec so the parts concat
+encoders = {'h264': 'libx264', 'hevc': 'libx265'}
+encode_preset = 'fast'
+encode_crf = 18
+
+
+class ProbeCache(VideoCache):
+    """ffprobe results keyed by path, size and modification time."""
+
+    table = 'probes'
+
+    def __init__(self, path=probe_cache_file):
+        super().__init__(path)
+
+
+def probe_info(input_file, cache=None):
+    """Return duration, video codec, pixel format, timescale and frame rate from the container metadata."""
+    def compute():
+        data = run_ffprobe(['-show_format', '-show_streams', input_file], ffprobe_path)
+        info = {'duration': float(data['format']['duration'])}
+        for stream in data.get('streams', []):
+            if stream.get('codec_type') == 'video':
+                info['codec'] = stream.get('codec_name')
+                info['pix_fmt'] = stream.get('pix_fmt')
+                info['timescale'] = int(stream.get('time_base', '1/90000').split('/')[1])
+                num, _, den = stream.get('avg_frame_rate', '0/0').partition('/')
+                if num.isdigit() and den.isdigit() and int(den):
+                    info['fps'] = int(num) / int(den)
+                break
+        return info
+    return cache.get(input_file, 'info v2', compute) if cache else compute()
+
+
+def probe_keyframes(input_file, start, end, cache=None):
+    """Return video keyframe times near start and near end, read from packet flags without decoding."""
+    def compute():
+        times = []
+        intervals = f'{max(start - 1, 0)}%+{keyframe_window},{max(end - keyframe_window, 0)}%{end + 1}'
+        data = run_ffprobe([
+            '-select_streams', 'v:0', '-read_intervals', intervals,
+            '-show_entries', 'packet=pts_time,flags', input_file
+        ], ffprobe_path)
+        for packet in data.get('packets', []):
+            if 'K' in packet.get('flags', '') and packet.get('pts_time') not in (None, 'N/A'):
+                times.append(float(packet['pts_time']))
+        return sorted(set(times))
+    return cache.get(input_file, f'keyframes {start:.3f} {end:.3f}', compute) if cache else compute()
+
+
+def run_ffmpeg(args):
+    cmd = [ffmpeg_path, '-y', '-v', 'error'] + args
+    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def encode_args(info):
+    args = ['-c:v', encoders.get(info.get('codec'), 'libx264'), '-preset', encode_preset, '-crf', str(encode_crf)]
+    if info.get('pix_fmt'):
+        args += ['-pix_fmt', info['pix_fmt']]
+    return args
+
+
+def cut_copy(input_file, output_file, start, length):
+    # Seeking before -i jumps straight to the keyframe instead of reading from the beginning
+    run_ffmpeg([
+        '-ss', f'{start:.6f}', '-i', input_file, '-t', f'{length:.6f}',
+        '-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', output_file
+    ])
+
+
+def cut_reencode(input_file, output_file, start, length, info):
+    run_ffmpeg(['-ss', f'{start:.6f}', '-i', input_file, '-t', f'{length:.6f}', '-map', '0:v:0', '-map', '0:a?']
+               + encode_args(info) + ['-c:a', 'aac', output_file])
+
+
+def cut_smart(input_file, output_file, start, end, keyframes, info, work_dir):
+    """Cut [start, end) exactly, re-encoding only the partial GOPs at either end.
+
+    The video between the first keyframe after start and the last keyframe before
+    end is stream copied. The head and tail are re-encoded with the source codec,
+    the three parts are joined with the concat demuxer, and the audio is copied
+    over from the source for the whole range.
+
+    The parts are MPEG-TS, so each keeps its own SPS/PPS in the stream (Annex B).
+    As MP4 parts the concat would reuse the first part's headers for all of them,
+    and the copied middle would decode corrupted whenever the encoder's
+    parameters differ from the source's.
+    """
+    inner = [t for t in keyframes if start <= t <= end]
+    first, last = inner[0], inner[-1]
+    parts = []
+    if first - start > 0.001:
+        head = os.path.join(work_dir, 'head.ts')
+        run_ffmpeg(['-ss', f'{start:.6f}', '-i', input_file, '-t', f'{first - start:.6f}', '-map', '0:v:0']
+                   + encode_args(info) + [head])
+        parts.append(head)
+    # The mpegts muxer converts the copied stream to Annex B, headers included, by itself
+    middle = os.path.join(work_dir, 'middle.ts')
+    run_ffmpeg(['-ss', f'{first:.6f}', '-i', input_file, '-t', f'{last - first:.6f}', '-map', '0:v:0',
+                '-c', 'copy', '-avoid_negative_ts', 'make_zero', middle])
+    parts.append(middle)
+    if end - last > 0.001:
+        tail = os.path.join(work_dir, 'tail.ts')
+        run_ffmpeg(['-ss', f'{last:.6f}', '-i', input_file, '-t', f'{end - last:.6f}', '-map', '0:v:0']
+                   + encode_args(info) + [tail])
+        parts.append(tail)
+
+    concat_list = os.path.join(work_dir, 'parts.txt')
+    with open(concat_list, 'w', encoding='utf-8') as f:
+        for part in parts:
+            f.write(f"file '{os.path.abspath(part)}'\n")
+    run_ffmpeg([
+        '-f', 'concat', '-safe', '0', '-i', concat_list,
+        '-ss', f'{start:.6f}', '-t', f'{end - start:.6f}', '-i', input_file,
+        '-map', '0:v:0', '-map', '1:a?', '-c', 'copy', '-shortest',
+        '-video_track_timescale', str(info.get('timescale', 90000)), output_file
+    ])
+
+
+def check_decode(output_file, length, info):
+    """Decode every video frame of output_file and raise ValueError if any fail or frames are missing."""
+    cmd = [ffprobe_path, '-v', 'error', '-count_frames', '-select_streams', 'v:0',
+           '-show_entries', 'stream=nb_read_frames', '-print_format', 'json', output_file]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    errors = result.stderr.strip().splitlines()
+    if errors:
+        raise ValueError(f"output doesn't decode cleanly: {errors[0]}")
+    frames = int(json.loads(result.stdout)['streams'][0].get('nb_read_frames') or 0)
+    # A frame either way for rounding at each cut point
+    expected = round(length * info['fps']) if info.get('fps') else frames
+    if not frames or abs(frames - expected) > 2:
+        raise ValueError(f"output decodes to {frames} frames, expected {expected}")
+
+
+def trim_file(input_file, output_file, head=5.0, tail=5.0, frame_accurate=False, cache=None):
+    """Remove head seconds from the start and tail seconds from the end of input_file.
+
+    By default the cut is a stream copy, which starts on the keyframe at or before
+    the cut point. With frame_accurate the cut is exact, and only the GOPs the cut
+    points fall inside are re-encoded. Returns a report dict with the mode used and
+    the time taken.
+    """
+    started = time.perf_counter()
+    report = {'input': input_file, 'output': output_file, 'mode': None, 'seconds': 0.0, 'error': None}
+    try:
+        info = probe_info(input_file, cache)
+        start, end = head, info['duration'] - tail
+        if end <= start:
+            raise ValueError(f"video is only {info['duration']:.1f}s long")
+
+        if not frame_accurate:
+            report['mode'] = 'copy'
+            cut_copy(input_file, output_file, start, end - start)
+        else:
+            keyframes = probe_keyframes(input_file, start, end, cache)
+            inner = [t for t in keyframes if start <= t <= end]
+            if info.get('codec') not in encoders or len(inner) < 2:
+                # Nothing to copy between the cut points, or no matching encoder
+                report['mode'] = 'reencode'
+                cut_reencode(input_file, output_file, start, end - start, info)
+            else:
+                report['mode'] = 'smart'
+                work_dir = tempfile.mkdtemp(prefix='trim_', dir=os.path.dirname(os.path.abspath(output_file)))
+                try:
+                    cut_smart(input_file, output_file, start, end, keyframes, info, work_dir)
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                try:
+                    check_decode(output_file, end - start, info)
+                except Exception:
+                    # Don't leave a broken cut next to the good ones
+                    os.remove(output_file)
+                    raise
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or '').strip()
+        report['error'] = stderr.splitlines()[-1] if stderr else str(e)
+    except Exception as e:
+        report['error'] = str(e)
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def trim_labels(video_folder, output_folder, start_label, end_label, head=5.0, tail=5.0,
+                frame_accurate=False, workers=max_workers, cache_path=probe_cache_file):
+    """Trim {label}.mp4 into {label}_cut.mp4 for every label in the range, several files at a time."""
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = []
+    for label in range(start_label, end_label + 1):
+        input_file = os.path.join(video_folder, f"{label}.mp4")
+        if not os.path.isfile(input_file):
+            print(f"Video file {input_file} not found, skipping.")
+            continue
+        jobs.append((label, input_file, os.path.join(output_folder, f"{label}_cut.mp4")))
+
+    cache = ProbeCache(cache_path)
+    reports = []
+    # Each job is an ffmpeg subprocess, so threads are enough to keep every core busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(trim_file, input_file, output_file, head, tail, frame_accurate, cache): label
+            for label, input_file, output_file in jobs
+        }
+        for future in as_completed(futures):
+            report = future.result()
+            report['label'] = futures[future]
+            if report['error']:
+                print(f"Processing failed for {report['input']} with error: {report['error']}")
+            else:
+                print(f"Saved cut video to {report['output']} ({report['mode']}, {report['seconds']:.1f}s).")
+            reports.append(report)
+    cache.close()
+    reports.sort(key=lambda report: report['label'])
+    return reports
+
+
+def print_report(reports):
+    print(f"{'Label':>6}  {'Mode':<8}  {'Seconds':>8}  Result")
+    for report in reports:
+        result = f"failed: {report['error']}" if report['error'] else 'ok'
+        print(f"{report['label']:>6}  {report['mode'] or '-':<8}  {report['seconds']:>8.1f}  {result}")
+    total = sum(report['seconds'] for report in reports)
+    print(f"{len(reports)} files, {total:.1f}s of ffmpeg time.")
+
+
+if __name__ == "__main__":
+    video_folder = "videos"  # Path to your video folder
+    output_folder = "output_videos"  # Path to save the cut videos
+    start_label = int(input("Enter the start label: "))  # Define the start label
+    end_label = int(input("Enter the end label: "))  # Define the end label
+    frame_accurate = input("Frame accurate cuts? (y/N): ").strip().lower() == 'y'
+
+    print_report(trim_labels(video_folder, output_folder, start_label, end_label, frame_accurate=frame_accurate))
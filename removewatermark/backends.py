@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+import logging
+
+# Preferred order when the backend is 'auto'
+backend_order = ['cuda', 'opencl', 'cpu']
+
+
+class CPUBackend:
+    """Reference backend, plain OpenCV on NumPy arrays. The others must match its results."""
+
+    name = 'cpu'
+
+    def match(self, image, template):
+        return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+
+class OpenCLBackend(CPUBackend):
+    """OpenCV's transparent API, running on whatever OpenCL device OpenCV picked."""
+
+    name = 'opencl'
+
+    def __init__(self):
+        cv2.ocl.setUseOpenCL(True)
+
+    def match(self, image, template):
+        return cv2.matchTemplate(cv2.UMat(image), cv2.UMat(template), cv2.TM_CCOEFF_NORMED).get()
+
+
+class CUDABackend(CPUBackend):
+    """OpenCV's cuda module. The template stays on the GPU between calls."""
+
+    name = 'cuda'
+
+    def __init__(self):
+        self.matchers = {}
+        self.template = None
+        self.gpu_template = None
+        self.gpu_image = cv2.cuda_GpuMat()
+
+    def match(self, image, template):
+        image_type = cv2.CV_8UC1 if image.ndim == 2 else cv2.CV_8UC3
+        if image_type not in self.matchers:
+            self.matchers[image_type] = cv2.cuda.createTemplateMatching(image_type, cv2.TM_CCOEFF_NORMED)
+        # Compared by contents, a new template can reuse a freed one's id. It's small, so this is cheap
+        if self.template is None or self.template.shape != template.shape or not np.array_equal(self.template, template):
+            self.gpu_template = cv2.cuda_GpuMat(template)
+            self.template = template.copy()
+        self.gpu_image.upload(image)
+        return self.matchers[image_type].match(self.gpu_image, self.gpu_template).download()
+
+
+backends = {backend.name: backend for backend in (CPUBackend, OpenCLBackend, CUDABackend)}
+
+
+def _probe(name):
+    # Creating a backend isn't enough, some builds only fail on the first real call
+    if name == 'cuda' and (not hasattr(cv2, 'cuda') or cv2.cuda.getCudaEnabledDeviceCount() == 0):
+        return None
+    if name == 'opencl' and not cv2.ocl.haveOpenCL():
+        return None
+    try:
+        backend = backends[name]()
+        image = np.zeros((64, 64), np.uint8)
+        image[20:30, 20:40] = 255
+        backend.match(image, image[15:35, 15:45].copy())
+    except (cv2.error, AttributeError) as e:
+        logging.info(f"{name} backend unavailable: {e}")
+        return None
+    return backend
+
+
+def available_backends():
+    """Names of the backends that work on this machine, best first."""
+    return [name for name in backend_order if _probe(name) is not None]
+
+
+def get_backend(name='auto'):
+    """Return a working backend, falling back to the CPU when the requested one isn't available."""
+    names = backend_order if name == 'auto' else [name, 'cpu']
+    for candidate in names:
+        backend = _probe(candidate)
+        if backend is not None:
+            if candidate != name and name != 'auto':
+                logging.warning(f"{name} backend unavailable, using {candidate}")
+            return backend
+    return CPUBackend()
@@ -0,0 +1,184 @@
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+import watermark_roi
+
+# Done and failed files with their timings, rewritten after every file
+manifest_file = 'removal_manifest.json'
+
+# Number of videos processed at the same time
+workers = os.cpu_count() or 4
+
+# Loaded once per worker process by init_worker
+worker_template = None
+worker_error = None
+
+
+def find_inputs(video_folder='videos', start_label=None, end_label=None, pattern=None):
+    """Return the videos to process, from a glob pattern or {label}.mp4 files in a label range."""
+    if pattern:
+        return sorted(glob.glob(pattern))
+    inputs = []
+    for label in range(start_label, end_label + 1):
+        input_path = os.path.join(video_folder, f"{label}.mp4")
+        if os.path.isfile(input_path):
+            inputs.append(input_path)
+        else:
+            print(f"Video file {input_path} not found, skipping.")
+    return inputs
+
+
+def is_up_to_date(input_path, output_path, template_path):
+    # The output only counts as current if it is newer than both things it was made from
+    if not os.path.exists(output_path):
+        return False
+    sources = [input_path] + ([template_path] if template_path else [])
+    return os.path.getmtime(output_path) >= max(os.path.getmtime(source) for source in sources)
+
+
+def load_manifest(path=manifest_file):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=manifest_file):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def init_worker(template_path, grayscale):
+    # An exception here would make the pool restart the worker forever, so it's reported per file instead
+    global worker_template, worker_error
+    logging.basicConfig(level=logging.WARNING)
+    if template_path:
+        try:
+            worker_template = watermark_roi.load_template(template_path, grayscale)
+        except Exception as e:
+            logging.error(f"Error opening template file: {template_path}: {e}")
+        if worker_template is None:
+            worker_error = f"Template {template_path} failed to load"
+
+
+def output_path_for(input_path, output_folder):
+    return os.path.join(output_folder, os.path.splitext(os.path.basename(input_path))[0] + '.mp4')
+
+
+def remove_one(job):
+    input_path, output_path, options = job
+    started = time.perf_counter()
+    # Written under a temporary name, so an interrupted file never looks up to date
+    part_path = output_path[:-4] + '.part.mp4'
+    region = None
+    try:
+        # Without its template a file would quietly fall back to contour detection
+        if worker_error:
+            raise RuntimeError(worker_error)
+        # Located here rather than in remove_watermark, so a video without a watermark can be told apart
+        region = watermark_roi.locate_watermark(input_path, worker_template)
+        fill = watermark_roi.make_filler(input_path, region, options['fill'])
+        ok = watermark_roi.process_video(input_path, part_path, region, fill, show_progress=False,
+                                         encoder=options['encoder']) is not None
+        error = None if ok else 'removal failed'
+        if ok:
+            os.replace(part_path, output_path)
+    except Exception as e:
+        error = str(e)
+    if error and os.path.exists(part_path):
+        os.remove(part_path)
+    return input_path, {
+        'output': output_path,
+        # Without a watermark the output is a plain copy, kept so the video isn't retried every run
+        'status': 'failed' if error else 'no_watermark' if region is None else 'done',
+        'seconds': round(time.perf_counter() - started, 2),
+        'error': error,
+        'finished_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def run_batch(inputs, output_folder, template_path, workers=workers, grayscale=True, fill='black',
+              encoder=watermark_roi.encoder, manifest_path=manifest_file, force=False):
+    """Remove the watermark from every input whose output is missing or older than its sources.
+
+    Each pool worker loads the template once and then takes whole videos. The
+    manifest records every finished file with its status and time taken.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    if template_path and watermark_roi.load_template(template_path, grayscale) is None:
+        print(f"Template {template_path} could not be loaded, no videos processed.")
+        return manifest
+    options = {'fill': fill, 'encoder': encoder}
+
+    # Outputs are named after the input file alone, so inputs from different folders can collide
+    sources = {}
+    for input_path in inputs:
+        sources.setdefault(output_path_for(input_path, output_folder), []).append(input_path)
+    collisions = {output_path: paths for output_path, paths in sources.items() if len(paths) > 1}
+    if collisions:
+        for output_path, paths in collisions.items():
+            print(f"{output_path} would be written by {', '.join(paths)}")
+        print("Inputs with the same file name would overwrite each other, no videos processed.")
+        return manifest
+
+    jobs = []
+    for input_path in inputs:
+        output_path = output_path_for(input_path, output_folder)
+        if not force and is_up_to_date(input_path, output_path, template_path):
+            continue
+        jobs.append((input_path, output_path, options))
+    print(f"{len(inputs) - len(jobs)} of {len(inputs)} videos up to date, processing {len(jobs)}.")
+    if not jobs:
+        return manifest
+
+    with multiprocessing.Pool(min(workers, len(jobs)), initializer=init_worker,
+                              initargs=(template_path, grayscale)) as pool:
+        for done, (input_path, entry) in enumerate(pool.imap_unordered(remove_one, jobs), 1):
+            manifest[input_path] = entry
+            save_manifest(manifest, manifest_path)
+            result = f"failed: {entry['error']}" if entry['error'] else entry['status']
+            print(f"[{done}/{len(jobs)}] {input_path} {result} in {entry['seconds']:.1f}s")
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Remove the watermark from many videos')
+    parser.add_argument('template', help='Path to watermark template image')
+    parser.add_argument('--labels', help='Label range such as 1-50, read as {label}.mp4 from --video-folder')
+    parser.add_argument('--video-folder', default='videos', help='Folder holding the labelled videos')
+    parser.add_argument('--glob', help='Glob pattern of input videos, instead of --labels')
+    parser.add_argument('--output-folder', default='output_videos', help='Folder for the cleaned videos')
+    parser.add_argument('--workers', type=int, default=workers, help='Number of videos processed at once')
+    parser.add_argument('--color', action='store_true', help='Match the template in color, like removeccc.py')
+    parser.add_argument('--fill', choices=['black', 'inpaint', 'stable'], default='black', help='How to cover the watermark')
+    parser.add_argument('--encoder', choices=['x264', 'mp4v'], default=watermark_roi.encoder, help='Output video encoder')
+    parser.add_argument('--manifest', default=manifest_file, help='Path of the JSON manifest')
+    parser.add_argument('--force', action='store_true', help='Process videos even when their output is up to date')
+    args = parser.parse_args()
+
+    if not args.labels and not args.glob:
+        parser.error('give either --labels or --glob')
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.glob:
+        inputs = find_inputs(pattern=args.glob)
+    else:
+        start_label, end_label = (int(label) for label in args.labels.split('-'))
+        inputs = find_inputs(args.video_folder, start_label, end_label)
+
+    manifest = run_batch(inputs, args.output_folder, args.template, args.workers, not args.color, args.fill,
+                         args.encoder, args.manifest, args.force)
+    failed = [path for path in inputs if manifest.get(path, {}).get('status') == 'failed']
+    if failed:
+        print(f"{len(failed)} videos failed, see {args.manifest}.")
+    no_watermark = [path for path in inputs if manifest.get(path, {}).get('status') == 'no_watermark']
+    if no_watermark:
+        print(f"{len(no_watermark)} videos had no watermark found and were copied unchanged, see {args.manifest}.")
@@ -0,0 +1,126 @@
+import os
+import glob
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+import cv2
+import watermark_roi
+from ffmpeg_writer import ffmpeg_path
+
+# Number of segments processed at the same time
+workers = os.cpu_count() or 4
+
+# Segments per worker, more than one so a slow segment doesn't leave the other cores idle
+segments_per_worker = 3
+
+# Segments shorter than this aren't worth the extra process
+min_segment_seconds = 10
+
+
+def run_ffmpeg(args):
+    cmd = [ffmpeg_path, '-y', '-v', 'error'] + args
+    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+
+def video_duration(video_path):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return frames / fps if fps > 0 else 0
+
+
+def split_segments(video_path, work_dir, segment_seconds):
+    """Split the video stream into keyframe-aligned pieces without re-encoding."""
+    pattern = os.path.join(work_dir, 'segment_%04d.mp4')
+    run_ffmpeg([
+        '-i', video_path, '-map', '0:v:0', '-c', 'copy', '-f', 'segment',
+        '-segment_time', str(segment_seconds), '-reset_timestamps', '1', pattern
+    ])
+    return sorted(glob.glob(os.path.join(work_dir, 'segment_*.mp4')))
+
+
+def join_segments(segments, video_path, output_path, work_dir):
+    """Concatenate the processed segments and mux the source audio back in, all stream copies."""
+    concat_list = os.path.join(work_dir, 'segments.txt')
+    with open(concat_list, 'w', encoding='utf-8') as f:
+        for segment in segments:
+            f.write(f"file '{os.path.abspath(segment)}'\n")
+    run_ffmpeg([
+        '-f', 'concat', '-safe', '0', '-i', concat_list, '-i', video_path,
+        '-map', '0:v:0', '-map', '1:a?', '-c', 'copy', '-shortest', output_path
+    ])
+
+
+def process_segment(job):
+    segment, output, region, fill, encoder = job
+    # Segments are video only, the source audio is added when they are joined
+    return watermark_roi.process_video(segment, output, region, fill, show_progress=False, encoder=encoder, audio=False)
+
+
+def remove_watermark_chunked(video_path, output_path, template_path=None, grayscale=True, use_contours=True,
+                             fill='black', workers=workers, match=None, encoder=watermark_roi.encoder):
+    """Same result as watermark_roi.remove_watermark, with the frames processed on several cores.
+
+    The watermark is located once in this process. The video is then split at
+    keyframes, each segment is processed by a pool worker with its own capture
+    and writer, and the pieces are joined back in order with the source audio.
+    """
+    template = None
+    if template_path:
+        template = watermark_roi.load_template(template_path, grayscale)
+        if template is None:
+            return False
+
+    region = watermark_roi.locate_watermark(video_path, template, use_contours=use_contours, match=match)
+    if region is None:
+        logging.warning(f"No watermark found in {video_path}, frames are copied unchanged")
+    else:
+        logging.info(f"Watermark located: {region}")
+
+    segment_seconds = max(min_segment_seconds, video_duration(video_path) / (workers * segments_per_worker))
+    work_dir = tempfile.mkdtemp(prefix='chunks_', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        segments = split_segments(video_path, work_dir, segment_seconds)
+        # Built once here, so every worker starts from the same cached mask
+        fill = watermark_roi.make_filler(video_path, region, fill)
+        jobs = [(segment, segment[:-4] + '_done.mp4', region, fill, encoder) for segment in segments]
+        logging.info(f"Processing {len(jobs)} segments on {workers} workers")
+        with multiprocessing.Pool(min(workers, len(jobs)) or 1) as pool:
+            for done, count in enumerate(pool.imap(process_segment, jobs), 1):
+                if count is None:
+                    logging.error(f"Failed to process a segment of {video_path}")
+                    return False
+                print(f"Processed segment {done}/{len(jobs)}", end='\r')
+        join_segments([job[1] for job in jobs], video_path, output_path, work_dir)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"ffmpeg failed for {video_path}: {e.stderr.strip()}")
+        return False
+    except Exception as e:
+        # A worker or the join can fail in other ways (lost process, unreadable segment, full disk)
+        logging.error(f"Chunked removal failed for {video_path}: {e}")
+        return False
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\nWatermark removal completed.")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Remove watermark from video using all cores')
+    parser.add_argument('input_video', help='Path to input video file')
+    parser.add_argument('output_video', help='Path to output video file')
+    parser.add_argument('template', help='Path to watermark template image')
+    parser.add_argument('--workers', type=int, default=workers, help='Number of worker processes')
+    parser.add_argument('--fill', choices=['black', 'inpaint', 'stable'], default='black', help='How to cover the watermark')
+    parser.add_argument('--encoder', choices=['x264', 'mp4v'], default=watermark_roi.encoder, help='Output video encoder')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    remove_watermark_chunked(args.input_video, args.output_video, args.template, fill=args.fill, workers=args.workers,
+                             encoder=args.encoder)
@@ -0,0 +1,63 @@
+import shutil
+import logging
+import subprocess
+
+ffmpeg_path = shutil.which('ffmpeg') or 'ffmpeg'
+
+# x264 settings for the output, slower presets give smaller files at the same quality
+preset = 'medium'
+crf = 20
+
+# The source audio is copied, set to e.g. 'aac' if a source codec doesn't fit in mp4
+audio_codec = 'copy'
+
+
+def ffmpeg_available():
+    return shutil.which(ffmpeg_path) is not None
+
+
+class FFmpegWriter:
+    """Drop-in for cv2.VideoWriter that pipes raw BGR frames into ffmpeg.
+
+    Encodes with libx264 and, when audio_source is given, copies that file's
+    audio into the output in the same pass, so no remux is needed afterwards.
+    """
+
+    def __init__(self, output_path, fps, size, audio_source=None, preset=preset, crf=crf):
+        # Containers with a broken header report 0 fps, which ffmpeg would only reject after the first frame
+        if not fps > 0:
+            raise ValueError(f"Invalid frame rate {fps} for {output_path}")
+        width, height = size
+        cmd = [
+            ffmpeg_path, '-y', '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-'
+        ]
+        if audio_source:
+            cmd += ['-i', audio_source, '-map', '0:v:0', '-map', '1:a?', '-c:a', audio_codec, '-shortest']
+        cmd += ['-c:v', 'libx264', '-preset', preset, '-crf', str(crf), '-pix_fmt', 'yuv420p', output_path]
+        self.output_path = output_path
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def isOpened(self):
+        return self.process.poll() is None
+
+    def write(self, frame):
+        try:
+            self.process.stdin.write(frame.data if frame.flags['C_CONTIGUOUS'] else frame.tobytes())
+        except BrokenPipeError:
+            # ffmpeg exited early, release raises with its error message when it has one
+            self.release()
+            raise RuntimeError(f"ffmpeg stopped reading frames for {self.output_path}")
+
+    def release(self):
+        if self.process.stdin.closed:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self.process.stderr.read().decode(errors='replace').strip()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.output_path}: {stderr}")
+        if stderr:
+            logging.warning(f"ffmpeg: {stderr}")
@@ -0,0 +1,150 @@
+import time
+import queue
+import threading
+import numpy as np
+
+# Frames allowed to wait between two stages
+queue_size = 8
+
+
+class StageCounter:
+    """Frames handled by a stage and the time it spent working, not waiting on its neighbours."""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+
+    @property
+    def fps(self):
+        return self.frames / self.busy if self.busy > 0 else float('inf')
+
+    def __str__(self):
+        return f"{self.name}: {self.frames} frames, {self.busy:.1f}s busy, {self.fps:.0f} fps"
+
+
+class FramePipeline:
+    """Overlaps decoding, processing and encoding on three threads.
+
+    Frames are decoded into a fixed pool of preallocated buffers, which go back
+    to the pool once written, so no frame memory is allocated per frame. The
+    bounded queues keep a fast stage from running ahead of a slow one. OpenCV
+    releases the GIL while decoding, encoding and in most filters, so the stages
+    really do run at the same time.
+    """
+
+    def __init__(self, cap, writer, process, width, height, queue_size=queue_size):
+        self.cap = cap
+        self.writer = writer
+        self.process = process
+        self.decoded = queue.Queue(queue_size)
+        self.processed = queue.Queue(queue_size)
+        # Enough buffers for both queues to be full while every stage holds one
+        self.free = queue.Queue()
+        for _ in range(2 * queue_size + 3):
+            self.free.put(np.empty((height, width, 3), np.uint8))
+        self.counters = [StageCounter('decode'), StageCounter('process'), StageCounter('encode')]
+        self.error = None
+        self.stopped = threading.Event()
+
+    def _put(self, target, item):
+        # Give up if another stage failed, instead of blocking on a queue nobody empties
+        while not self.stopped.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source):
+        while not self.stopped.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _fail(self, error):
+        if self.error is None:
+            self.error = error
+        self.stopped.set()
+
+    def _decode(self):
+        counter = self.counters[0]
+        try:
+            while True:
+                buffer = self._get(self.free)
+                if buffer is None:
+                    return
+                started = time.perf_counter()
+                ret, frame = self.cap.read(buffer)
+                counter.busy += time.perf_counter() - started
+                if not ret:
+                    break
+                counter.frames += 1
+                if not self._put(self.decoded, frame):
+                    return
+        except Exception as e:
+            self._fail(e)
+        self._put(self.decoded, None)
+
+    def _process(self):
+        counter = self.counters[1]
+        try:
+            while True:
+                frame = self._get(self.decoded)
+                if frame is None:
+                    break
+                started = time.perf_counter()
+                frame = self.process(frame)
+                counter.busy += time.perf_counter() - started
+                counter.frames += 1
+                if not self._put(self.processed, frame):
+                    return
+        except Exception as e:
+            self._fail(e)
+        self._put(self.processed, None)
+
+    def run(self, on_frame=None):
+        """Run until the capture is exhausted, returning the number of frames written.
+
+        Encoding happens on the calling thread. on_frame(count) is called after
+        every written frame.
+        """
+        threads = [threading.Thread(target=self._decode, daemon=True),
+                   threading.Thread(target=self._process, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        counter = self.counters[2]
+        try:
+            while True:
+                frame = self._get(self.processed)
+                if frame is None:
+                    break
+                started = time.perf_counter()
+                self.writer.write(frame)
+                counter.busy += time.perf_counter() - started
+                counter.frames += 1
+                self.free.put(frame)
+                if on_frame:
+                    on_frame(counter.frames)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self.stopped.set()
+            for thread in threads:
+                thread.join()
+
+        if self.error is not None:
+            raise self.error
+        return counter.frames
+
+    def bottleneck(self):
+        return min(self.counters, key=lambda counter: counter.fps)
+
+    def report(self):
+        lines = [str(counter) for counter in self.counters]
+        lines.append(f"bottleneck: {self.bottleneck().name}")
+        return '\n'.join(lines)
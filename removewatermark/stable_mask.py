@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+# Share of sampled frames in which a pixel must look like watermark to be masked
+mask_vote = 0.6
+
+# Real pixels kept around the region for the fill to draw from
+padding = 12
+
+# Blur sizes used to fill the masked pixels, larger ones only reach the middle of thick strokes
+blur_sizes = (15, 31, 63, 127)
+
+# Mean gray level error on the ring around the mask above which the blur fill
+# isn't trusted and the frame is inpainted instead
+residual_threshold = 12.0
+
+# Histogram distance between consecutive frames that counts as a scene cut
+scene_cut_threshold = 0.5
+
+# After a cut, the mask is rebuilt from this many frames, taken this many frames apart
+refresh_frames = 5
+refresh_stride = 5
+
+
+# Pixels this far from their local mean look like watermark strokes, light or dark
+stroke_contrast = 12
+
+
+def watermark_pixels(gray):
+    local_mean = cv2.blur(gray, (21, 21))
+    return cv2.absdiff(gray, local_mean) > stroke_contrast
+
+
+def vote_mask(grays, box):
+    """Mask of the pixels inside box that threshold as watermark in most of the grays.
+
+    Static watermark strokes show up in nearly every frame, moving content
+    doesn't, so the vote keeps the former.
+    """
+    votes = np.zeros(grays[0].shape, np.uint16)
+    for gray in grays:
+        votes += watermark_pixels(gray)
+    mask = np.zeros(grays[0].shape, np.uint8)
+    bx, by, bw, bh = box
+    mask[by:by + bh, bx:bx + bw] = (votes[by:by + bh, bx:bx + bw] >= mask_vote * len(grays)) * 255
+    # Cover the anti-aliased edges of the strokes as well
+    return cv2.dilate(mask, np.ones((3, 3), np.uint8))
+
+
+def frame_signature(frame):
+    # A nearest-neighbour thumbnail only reads a few thousand pixels of the frame
+    small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_NEAREST)
+    hist = cv2.calcHist([small], [0, 1, 2], None, [8, 8, 8], [0, 256, 0, 256, 0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+
+class MaskedFill:
+    """Fills a cached watermark mask with a mask-guided blur, frame after frame.
+
+    The mask is built once from sampled frames and only rebuilt after a scene
+    cut. Each frame the masked pixels are replaced by a normalized blur of the
+    unmasked ones around them, which costs a couple of box blurs on the region.
+    If that blur doesn't match the real pixels around the mask well (busy
+    texture), the frame falls back to TELEA inpainting with the same mask.
+    """
+
+    def __init__(self, region, frames):
+        height, width = frames[0].shape[:2]
+        self.x0, self.y0 = max(region.x - padding, 0), max(region.y - padding, 0)
+        self.x1 = min(region.x + region.w + padding, width)
+        self.y1 = min(region.y + region.h + padding, height)
+        self.box = (region.x - self.x0, region.y - self.y0, region.w, region.h)
+        grays = [cv2.cvtColor(frame[self.y0:self.y1, self.x0:self.x1], cv2.COLOR_BGR2GRAY) for frame in frames]
+        self.set_mask(vote_mask(grays, self.box))
+        self.last_signature = None
+        self.refresh = []
+        self.since_cut = 0
+        self.frames = 0
+        self.inpainted = 0
+        self.cuts = 0
+
+    def set_mask(self, mask):
+        self.mask = mask
+        self.masked = mask > 0
+        self.keep = (~self.masked).astype(np.float32)
+        # For each blur size, the masked pixels it fills (those no smaller blur
+        # reached) and the share of real pixels it averages there
+        self.scales = []
+        todo = self.masked.copy()
+        for size in blur_sizes:
+            weight = cv2.blur(self.keep, (size, size))
+            reached = todo & (weight > 0.05)
+            if reached.any():
+                if not self.scales:
+                    first_weight = weight
+                self.scales.append((size, reached, weight[reached][:, None]))
+                todo &= ~reached
+            if not todo.any():
+                break
+        ring = cv2.dilate(mask, np.ones((5, 5), np.uint8)) > 0
+        self.ring = ring & ~self.masked
+        if self.scales:
+            self.ring_weight = first_weight[self.ring][:, None]
+
+    def _check_scene_cut(self, frame, gray):
+        signature = frame_signature(frame)
+        if self.last_signature is not None:
+            distance = cv2.compareHist(self.last_signature, signature, cv2.HISTCMP_BHATTACHARYYA)
+            if distance > scene_cut_threshold:
+                self.cuts += 1
+                self.refresh = []
+                self.since_cut = 0
+        self.last_signature = signature
+        if self.cuts and len(self.refresh) < refresh_frames:
+            if self.since_cut % refresh_stride == 0:
+                self.refresh.append(gray)
+                if len(self.refresh) == refresh_frames:
+                    self.set_mask(vote_mask(self.refresh, self.box))
+            self.since_cut += 1
+
+    def __call__(self, frame):
+        roi = frame[self.y0:self.y1, self.x0:self.x1]
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        self._check_scene_cut(frame, gray)
+        self.frames += 1
+        if not self.scales:
+            return frame
+
+        values = roi.astype(np.float32)
+        kept = values * self.keep[..., None]
+        blurs = [cv2.blur(kept, (self.scales[0][0],) * 2)]
+
+        # How well the smallest blur predicts the real pixels right around the mask
+        if self.ring.any():
+            residual = np.abs(blurs[0][self.ring] / self.ring_weight - values[self.ring]).mean()
+            if residual > residual_threshold:
+                self.inpainted += 1
+                roi[:] = cv2.inpaint(roi, self.mask, 3, cv2.INPAINT_TELEA)
+                return frame
+
+        for size, _, _ in self.scales[1:]:
+            blurs.append(cv2.blur(kept, (size, size)))
+        for blurred, (_, reached, weight) in zip(blurs, self.scales):
+            roi[reached] = (blurred[reached] / weight).astype(np.uint8)
+        return frame
+
+    def summary(self):
+        return (f"{self.frames} frames, {self.inpainted} inpainted, "
+                f"{self.cuts} scene cuts, {int(self.masked.sum())} masked pixels")
@@ -1,23 +1,94 @@
+import sys
 import cv2
+import numpy as np
+import backends
+import watermark_roi
+
+# Where synthetic_frame draws the "ccc" watermark, as x, y, width, height
+watermark_box = (500, 300, 110, 45)
 
 def test_cuda():
     # Check if OpenCV is built with CUDA support
-    if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+    if hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0:
         print("OpenCV is built with CUDA support.")
-        
-        # Initialize a CUDA-enabled GPU matrix
-        gpu_mat = cv2.cuda_GpuMat()
-        
-        # Perform a simple operation on the GPU matrix
-        gpu_mat.upload(cv2.imread("image.jpg"))
-        gpu_mat = cv2.cuda.cvtColor(gpu_mat, cv2.COLOR_BGR2GRAY)
-        
-        # Download the result from GPU to CPU
-        result = gpu_mat.download()
-        
-        print("CUDA operations completed successfully.")
+        cv2.cuda.printShortCudaDeviceInfo(cv2.cuda.getDevice())
     else:
         print("OpenCV is not built with CUDA support.")
+    if cv2.ocl.haveOpenCL():
+        print(f"OpenCL device: {cv2.ocl.Device.getDefault().name()}")
+    else:
+        print("OpenCL is not available.")
+
+def synthetic_frame(seed, size=(360, 640)):
+    # Noise with a fixed bright "watermark" block near the bottom right
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 200, size + (3,), dtype=np.uint8)
+    cv2.putText(frame, 'ccc', (size[1] - 120, size[0] - 30), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    return frame
+
+def synthetic_template(grayscale=True):
+    # The watermark alone on black, like a template.png cut from a real video
+    frame = np.zeros((360, 640, 3), np.uint8)
+    cv2.putText(frame, 'ccc', (520, 330), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    x, y, w, h = watermark_box
+    template = frame[y:y + h, x:x + w].copy()
+    return cv2.cvtColor(template, cv2.COLOR_BGR2GRAY) if grayscale else template
+
+def check_location(backend):
+    """Check the backend finds the watermark where synthetic_frame put it, returning a list of failures.
+
+    Comparing against the CPU backend checks nothing on machines where the CPU
+    is the only backend, this checks the answer itself.
+    """
+    failures = []
+    frames = [synthetic_frame(seed) for seed in range(1, 4)]
+    # Color matching scores lower against the noise, so it gets a lower threshold
+    for grayscale, threshold in ((True, watermark_roi.match_threshold), (False, 0.6)):
+        kind = 'gray' if grayscale else 'color'
+        region = watermark_roi.locate_by_template(frames, synthetic_template(grayscale), threshold, match=backend.match)
+        if region is None:
+            failures.append(f"{kind}: watermark not found")
+        elif (region.x, region.y, region.w, region.h) != watermark_box or region.confidence < 1.0:
+            failures.append(f"{kind}: found {region}, expected {watermark_box} in every frame")
+    return failures
+
+def check_backend(backend, reference, tolerance=5e-3):
+    """Compare a backend against the CPU reference on synthetic frames, returning a list of failures."""
+    failures = []
+    x, y, w, h = watermark_box
+    template = synthetic_frame(0)[y:y + h, x:x + w].copy()
+    for seed in range(1, 4):
+        frame = synthetic_frame(seed)
+        for image, templ in ((cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)),
+                             (frame, template)):
+            expected = reference.match(image, templ)
+            result = backend.match(image, templ)
+            if result.shape != expected.shape:
+                failures.append(f"seed {seed}: shape {result.shape} != {expected.shape}")
+                continue
+            error = float(np.abs(result - expected).max())
+            if error > tolerance:
+                failures.append(f"seed {seed}: max error {error:.5f}")
+            if cv2.minMaxLoc(result)[3] != cv2.minMaxLoc(expected)[3]:
+                failures.append(f"seed {seed}: best match at {cv2.minMaxLoc(result)[3]}, expected {cv2.minMaxLoc(expected)[3]}")
+    return failures
+
+def check_backends():
+    """Validate every backend that works on this machine, against the CPU one and against the
+    known watermark position. Returns True if all pass."""
+    reference = backends.CPUBackend()
+    available = backends.available_backends()
+    print(f"Available backends: {', '.join(available)}")
+    passed = True
+    for name in available:
+        backend = backends.get_backend(name)
+        failures = check_location(backend) + check_backend(backend, reference)
+        print(f"{name}: {'ok' if not failures else 'FAILED'}")
+        for failure in failures:
+            print(f"  {failure}")
+        passed = passed and not failures
+    return passed
 
-# Run the CUDA test
-test_cuda()
\ No newline at end of file
+if __name__ == '__main__':
+    test_cuda()
+    sys.exit(0 if check_backends() else 1)
@@ -0,0 +1,250 @@
+import cv2
+import numpy as np
+import logging
+from pipeline import FramePipeline
+import ffmpeg_writer
+from stable_mask import MaskedFill
+
+# Number of frames sampled across the video to locate the watermark
+sample_count = 15
+
+# Minimum template match score for a sampled frame to count as a detection
+match_threshold = 0.8
+
+# Detections within this many pixels of each other count as the same position
+position_tolerance = 4
+
+# Share of sampled frames that must agree on the position
+min_confidence = 0.5
+
+# 'x264' pipes frames to ffmpeg and keeps the audio, 'mp4v' is the old cv2.VideoWriter output
+encoder = 'x264'
+
+
+class WatermarkRegion:
+    """Fixed rectangle holding the watermark, with the share of sampled frames that agreed on it."""
+
+    def __init__(self, x, y, w, h, confidence, score=None):
+        self.x, self.y, self.w, self.h = int(x), int(y), int(w), int(h)
+        self.confidence = confidence
+        self.score = score
+
+    def clip(self, width, height):
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1, y1 = min(self.x + self.w, width), min(self.y + self.h, height)
+        return WatermarkRegion(x0, y0, x1 - x0, y1 - y0, self.confidence, self.score)
+
+    def __repr__(self):
+        score = f", score {self.score:.2f}" if self.score is not None else ""
+        return f"WatermarkRegion({self.x}, {self.y}, {self.w}x{self.h}, confidence {self.confidence:.2f}{score})"
+
+
+def sample_frames(video_path, count=sample_count):
+    """Return up to count frames spread evenly over the video."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    if total_frames > 0:
+        positions = np.linspace(0, total_frames - 1, min(count, total_frames)).astype(int)
+        for position in sorted(set(positions)):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+    cap.release()
+    return frames
+
+
+def locate_by_template(frames, template, threshold=match_threshold, match=None):
+    """Vote on the template position over the sampled frames.
+
+    match(image, template) returns the result map, so a GPU matcher can be used
+    instead of cv2.matchTemplate. Grayscale templates are matched against
+    grayscale frames, color ones against the frames as they are.
+    """
+    match = match or (lambda image, template: cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED))
+    detections = []
+    for frame in frames:
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if template.ndim == 2 else frame
+        _, max_val, _, max_loc = cv2.minMaxLoc(match(image, template))
+        if max_val > threshold:
+            detections.append((max_val, max_loc))
+    if not detections:
+        return None
+
+    # The position most other detections agree with wins
+    best = []
+    for _, (x, y) in detections:
+        cluster = [(score, loc) for score, loc in detections
+                   if abs(loc[0] - x) <= position_tolerance and abs(loc[1] - y) <= position_tolerance]
+        if len(cluster) > len(best):
+            best = cluster
+    xs = [loc[0] for _, loc in best]
+    ys = [loc[1] for _, loc in best]
+    h, w = template.shape[:2]
+    return WatermarkRegion(np.median(xs), np.median(ys), w, h,
+                           len(best) / len(frames), float(np.mean([score for score, _ in best])))
+
+
+def locate_by_contours(frames, min_aspect=5, min_width=100, min_height=10):
+    """Vote on wide text-like contours (the old per-frame heuristic) over the sampled frames."""
+    votes = None
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = np.zeros(gray.shape, np.uint8)
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if float(w) / h > min_aspect and w > min_width and h > min_height:
+                boxes[y:y + h, x:x + w] = 1
+        votes = boxes.astype(np.uint16) if votes is None else votes + boxes
+    if votes is None:
+        return None
+
+    # Keep what shows up in most samples, static overlays do and moving content doesn't
+    stable = (votes >= max(1, min_confidence * len(frames))).astype(np.uint8)
+    contours, _ = cv2.findContours(stable, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    confidence = float(votes[y:y + h, x:x + w].mean()) / len(frames)
+    return WatermarkRegion(x, y, w, h, confidence)
+
+
+def locate_watermark(video_path, template=None, samples=sample_count, threshold=match_threshold,
+                     use_contours=True, match=None):
+    """Find the watermark once for the whole video from a sample of its frames.
+
+    The template vote is tried first. Without a template, or when it isn't found
+    in enough samples, wide contours that stay in place are used instead if
+    use_contours is set. Returns a WatermarkRegion, or None when nothing reaches
+    min_confidence.
+    """
+    frames = sample_frames(video_path, samples)
+    if not frames:
+        return None
+    height, width = frames[0].shape[:2]
+
+    candidates = []
+    if template is not None:
+        candidates.append(locate_by_template(frames, template, threshold, match))
+    if use_contours:
+        candidates.append(locate_by_contours(frames))
+    for region in candidates:
+        if region is not None and region.confidence >= min_confidence:
+            return region.clip(width, height)
+        if region is not None:
+            logging.info(f"Rejected {region}, below confidence {min_confidence}")
+    return None
+
+
+def fill_region(frame, region, fill='black'):
+    """Cover the watermark region in place, touching only that part of the frame."""
+    x, y, w, h = region.x, region.y, region.w, region.h
+    if fill == 'inpaint':
+        # Give the inpainting a border of real pixels to draw from
+        x0, y0 = max(x - 8, 0), max(y - 8, 0)
+        x1, y1 = min(x + w + 8, frame.shape[1]), min(y + h + 8, frame.shape[0])
+        roi = frame[y0:y1, x0:x1]
+        mask = np.zeros(roi.shape[:2], np.uint8)
+        mask[y - y0:y - y0 + h, x - x0:x - x0 + w] = 255
+        frame[y0:y1, x0:x1] = cv2.inpaint(roi, mask, 3, cv2.INPAINT_TELEA)
+    else:
+        frame[y:y + h, x:x + w] = 0
+    return frame
+
+
+def load_template(template_path, grayscale=True):
+    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    if template is None:
+        logging.error(f"Error opening template file: {template_path}")
+    return template
+
+
+def open_writer(output_path, fps, width, height, encoder=encoder, audio_source=None):
+    """Return a writer for output_path, an FFmpegWriter for 'x264' or a cv2.VideoWriter for 'mp4v'."""
+    if encoder == 'x264':
+        if ffmpeg_writer.ffmpeg_available():
+            return ffmpeg_writer.FFmpegWriter(output_path, fps, (width, height), audio_source)
+        logging.warning("ffmpeg not found, falling back to the mp4v writer without audio")
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+
+
+def make_filler(video_path, region, fill, samples=sample_count):
+    """Return the fill to pass to process_video, building the cached mask for 'stable'."""
+    if fill == 'stable' and region is not None:
+        filler = MaskedFill(region, sample_frames(video_path, samples))
+        logging.info(f"Cached watermark mask with {int(filler.masked.sum())} pixels")
+        return filler
+    return fill
+
+
+def process_video(video_path, output_path, region, fill='black', show_progress=True, encoder=encoder, audio=True):
+    """Cover region in every frame of video_path and write the result to output_path.
+
+    fill is 'black', 'inpaint', or a callable such as a MaskedFill that fills a
+    frame in place and returns it. With audio set and the x264 encoder, the source audio is muxed into the
+    output in the same pass. Returns the number of frames written, or None if
+    the video can't be opened.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logging.error(f"Error opening video file: {video_path}")
+        return None
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    out = open_writer(output_path, fps, width, height, encoder, video_path if audio else None)
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def process(frame):
+        if region is None:
+            return frame
+        return fill(frame) if callable(fill) else fill_region(frame, region, fill)
+
+    def on_frame(frame_num):
+        if show_progress and total_frames > 0:
+            progress = frame_num / total_frames * 100
+            print(f"Processing frame {frame_num}/{total_frames} ({progress:.2f}%)", end='\r')
+
+    # Decoding, filling and encoding run on their own threads and overlap
+    frames = FramePipeline(cap, out, process, width, height)
+    try:
+        frame_num = frames.run(on_frame)
+    finally:
+        cap.release()
+        out.release()
+    logging.info(f"Stage throughput for {video_path}:\n{frames.report()}")
+    if isinstance(fill, MaskedFill):
+        logging.info(f"Stable mask fill: {fill.summary()}")
+    return frame_num
+
+
+def remove_watermark(video_path, output_path, template_path=None, grayscale=True, use_contours=True,
+                     fill='black', samples=sample_count, match=None, encoder=encoder, template=None,
+                     show_progress=True):
+    """Locate the watermark from a few sampled frames, then cover that fixed region in every frame.
+
+    An already loaded template can be passed instead of template_path.
+    """
+    if template is None and template_path:
+        template = load_template(template_path, grayscale)
+        if template is None:
+            return False
+
+    region = locate_watermark(video_path, template, samples, use_contours=use_contours, match=match)
+    if region is None:
+        logging.warning(f"No watermark found in {video_path}, frames are copied unchanged")
+    else:
+        logging.info(f"Watermark located: {region}")
+
+    fill = make_filler(video_path, region, fill, samples)
+    if process_video(video_path, output_path, region, fill, show_progress, encoder) is None:
+        return False
+    if show_progress:
+        print("\nWatermark removal completed.")
+    return True